@@ -0,0 +1,63 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dcop.gibbs import BoltzmannSampler, dcop_gibbs, sample_from_probs
+from src.dcop.max_sum import load_instance
+
+
+def reference_sample(costs, beta, rng):
+    # The per-step path dcop_gibbs used before the table kernel
+    weights = [math.exp(-beta * cost) for cost in costs]
+    Z = sum(weights)
+    probs = [w / Z for w in weights] if Z > 0 else [1 / len(costs)] * len(costs)
+    return sample_from_probs(probs, rng)
+
+
+def time_kernel(draw, rows, beta, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for costs in rows:
+            draw(costs, beta)
+    return len(rows) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=4, help="number of colors")
+    parser.add_argument("--max-cost", type=int, default=8, help="largest neighbor count (node degree)")
+    parser.add_argument("--beta", type=float, default=2.0)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--instance", default=None, help="also time full dcop_gibbs runs on this instance")
+    parser.add_argument("--iters", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = [[rng.randint(0, args.max_cost) for _ in range(args.k)] for _ in range(args.rows)]
+
+    reference_rng = random.Random(1)
+    sampler = BoltzmannSampler(random.Random(1), args.max_cost)
+    reference = time_kernel(lambda costs, beta: reference_sample(costs, beta, reference_rng),
+                            rows, args.beta, args.repeat)
+    table = time_kernel(sampler.sample, rows, args.beta, args.repeat)
+
+    print(f"k={args.k} costs<={args.max_cost} beta={args.beta}")
+    print(f"{'kernel':<12}{'samples/sec':>14}")
+    print(f"{'reference':<12}{reference:>14,.0f}")
+    print(f"{'table':<12}{table:>14,.0f}")
+    print(f"speedup: {table / reference:.2f}x")
+
+    if args.instance:
+        instance = load_instance(args.instance)
+        res = dcop_gibbs(instance, max_iters=args.iters, beta=args.beta, seed=0)
+        print(f"\ndcop_gibbs on {instance.name}: {res['iterations']} updates, "
+              f"{res['updates_per_sec']:,.0f} node updates/sec")
+
+
+if __name__ == "__main__":
+    main()
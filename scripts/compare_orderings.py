@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dcop.adopt import load_instance
+from src.dcop.ordering import ORDERINGS, compare_orderings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predicted pseudo-tree width and depth per ordering heuristic")
+    parser.add_argument("instances", nargs="+", help="instance JSON files")
+    parser.add_argument("--orderings", nargs="+", default=list(ORDERINGS), choices=list(ORDERINGS))
+    parser.add_argument("--restarts", type=int, default=10, help="random trees tried by the random ordering")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for path in args.instances:
+        instance = load_instance(path)
+        k = len(instance.colors)
+        report = compare_orderings(instance.nodes, instance.edges, args.orderings, args.restarts, args.seed)
+        print(f"{instance.name}: {len(instance.nodes)} nodes, {len(instance.edges)} edges, {k} colors")
+        print(f"  {'ordering':<16}{'root':>8}{'width':>7}{'depth':>7}{'max UTIL':>12}")
+        for ordering, shape in sorted(report.items(), key=lambda item: (item[1]["width"], item[1]["depth"])):
+            print(f"  {ordering:<16}{str(shape['root']):>8}{shape['width']:>7}{shape['depth']:>7}"
+                  f"{k ** shape['width']:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import random
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dcop.adopt import load_instance, run_adopt
+from src.dcop.adopt_async import constant_delay, exponential_delay, run_adopt_async, uniform_delay
+from src.dcop.ordering import ORDERINGS
+
+
+def delay_from_args(args):
+    seconds = args.delay_ms / 1000
+    if args.delay == "constant":
+        return constant_delay(seconds)
+    if args.delay == "uniform":
+        return uniform_delay(0.0, 2 * seconds)
+    if args.delay == "exponential":
+        return exponential_delay(seconds)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asynchronous ADOPT with per-link message delays")
+    parser.add_argument("--instance", default="examples/graphs/random30.json")
+    parser.add_argument("--delay", default="exponential", choices=["none", "constant", "uniform", "exponential"])
+    parser.add_argument("--delay-ms", type=float, default=1.0, help="mean link delay in milliseconds")
+    parser.add_argument("--ordering", default="first", choices=[*ORDERINGS, "cheapest"])
+    parser.add_argument("--timeout", type=float, default=60.0, help="stop after this many seconds")
+    parser.add_argument("--max-messages", type=int, default=None)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    instance = load_instance(args.instance)
+    print(f"{instance.name}: {len(instance.nodes)} agents, delay={args.delay} ({args.delay_ms} ms mean), "
+          f"ordering={args.ordering}")
+    for seed in args.seeds:
+        random.seed(seed)
+        res = run_adopt_async(instance, delay=delay_from_args(args), seed=seed, ordering=args.ordering,
+                              timeout=args.timeout, max_messages=args.max_messages)
+        to_zero = f"{res['time_to_zero'] * 1000:.2f} ms" if res["time_to_zero"] is not None else "never"
+        print(f"  seed {seed}: conflicts={res['conflicts']} (best {res['best_conflicts']}), "
+              f"{'quiescent' if res['quiescent'] else 'stopped'} after {res['elapsed'] * 1000:.2f} ms")
+        print(f"    messages={res['messages']} {res['messages_by_type']}, value changes={res['value_changes']}")
+        print(f"    time to solution={res['time_to_solution'] * 1000:.2f} ms, time to zero={to_zero}")
+
+        random.seed(seed)
+        sync = run_adopt(instance, ordering=args.ordering)
+        print(f"    lock-step rounds for comparison: {sync['iterations']} rounds, {sync['messages']} messages, "
+              f"conflicts={sync['conflicts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dcop.adopt import load_instance
+from src.dcop.adopt_multiprocess import VARIANTS, run_adopt_multiprocess
+from src.dcop.ordering import ORDERINGS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ADOPT / BnB-ADOPT with agents in worker processes")
+    parser.add_argument("--instance", default="examples/graphs/random30.json")
+    parser.add_argument("--variant", default="bnb", choices=list(VARIANTS))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--placement", nargs="+", default=["tree", "round_robin"], choices=["tree", "round_robin"])
+    parser.add_argument("--ordering", default="first", choices=[*ORDERINGS, "cheapest"])
+    parser.add_argument("--max-iters", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bounds-cap", type=int, default=None, help="BnB: max cached contexts per agent")
+    parser.add_argument("--bounds-bytes", type=int, default=None, help="BnB: max cached bytes per agent")
+    args = parser.parse_args()
+
+    instance = load_instance(args.instance)
+    for placement in args.placement:
+        res = run_adopt_multiprocess(instance, variant=args.variant, max_iters=args.max_iters, workers=args.workers,
+                                     placement=placement, ordering=args.ordering, seed=args.seed,
+                                     **({"bounds_cap": args.bounds_cap, "bounds_bytes": args.bounds_bytes}
+                                        if args.variant == "bnb" else {}))
+        print(f"{instance.name} {args.variant}: {res['workers']} workers, placement={placement}")
+        print(f"  conflicts={res['conflicts']} after {res['iterations']} rounds, wall time {res['elapsed']:.2f} s")
+        print(f"  messages={res['messages']} (local {res['local_messages']}, remote {res['remote_messages']}, "
+              f"{res['remote_share']:.1%} remote), serialized {res['bytes_serialized']:,} bytes")
+        for (src, dst), link in res["links"].items():
+            print(f"    worker {src} -> {dst}: {link['messages']:>8} messages {link['bytes']:>12,} bytes")
+        if res["bounds"]:
+            b = res["bounds"]
+            print(f"  bounds cache: {b['entries']} contexts ({b['bytes']:,} bytes, largest agent {b['max_entries']}), "
+                  f"hit rate {b['hit_rate']:.1%}, {b['evictions']} evictions")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,15 @@ import os
 import sys
 import matplotlib.pyplot as plt
 import statistics
+import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.dcop.max_sum import load_instance
-from src.dcop.gibbs import dcop_gibbs, visualize_solution
+from src.dcop.gibbs import (
+    dcop_gibbs, dcop_gibbs_hogwild, dcop_gibbs_multichain, dcop_gibbs_tempering, visualize_solution
+)
+from src.dcop.telemetry import add_telemetry_arguments, telemetry_from_args
 
 
 
@@ -38,25 +42,70 @@ def main():
     p.add_argument("--iters", type=int, default=2000)
     p.add_argument("--beta", type=float, default=2.0)
     p.add_argument("--seeds", type=int, default=10, help="number of seeds (0..seeds-1)")
-    p.add_argument("--schedule", choices=["random", "round_robin"], default="random")
+    p.add_argument("--schedule", choices=["random", "round_robin", "chromatic"], default="random")
+    p.add_argument("--anneal", choices=["constant", "linear", "geometric"], default=None,
+                   help="ramp beta from --beta-start up to --beta over the run")
+    p.add_argument("--beta-start", type=float, default=0.1)
+    p.add_argument("--replicas", type=int, default=0,
+                   help="run parallel tempering with this many replicas (betas --beta-start..--beta)")
+    p.add_argument("--swap-every", type=int, default=50, help="steps between replica exchanges")
+    p.add_argument("--workers", type=int, default=None, help="processes for the tempering replicas")
+    p.add_argument("--hogwild", type=int, default=0,
+                   help="run lock-free shared-memory Gibbs with this many worker processes")
+    p.add_argument("--staleness", action="store_true",
+                   help="with --hogwild, compare each run with a one-worker run of the same length, observed the same way")
     p.add_argument("--plot_seed", type=int, default=0, help="which seed to plot")
+    add_telemetry_arguments(p)
     args = p.parse_args()
 
     inst = load_instance(args.instance)
 
-    results = []
     iters_success = []
     best_conflicts_all = []
 
-    for seed in range(args.seeds):
-        res = dcop_gibbs(
+    # The plotted seed streams to the configured sink; the others only keep the same bounded history
+    plot_telemetry = telemetry_from_args(args)
+    telemetry = [plot_telemetry if seed == args.plot_seed else plot_telemetry.spawn() for seed in range(args.seeds)]
+
+    start = time.perf_counter()
+    if args.hogwild:
+        results = [
+            dcop_gibbs_hogwild(inst, max_iters=args.iters, beta=args.beta, seed=seed, workers=args.hogwild,
+                               measure_staleness=args.staleness, telemetry=telemetry[seed])
+            for seed in range(args.seeds)
+        ]
+    elif args.replicas:
+        results = [
+            dcop_gibbs_tempering(inst, max_iters=args.iters, seed=seed, replicas=args.replicas,
+                                 beta_min=args.beta_start, beta_max=args.beta,
+                                 swap_every=args.swap_every, workers=args.workers, telemetry=telemetry[seed])
+            for seed in range(args.seeds)
+        ]
+    elif args.anneal:
+        results = [
+            dcop_gibbs(inst, max_iters=args.iters, beta=args.beta, seed=seed, schedule=args.schedule,
+                       anneal=args.anneal, beta_start=args.beta_start, telemetry=telemetry[seed])
+            for seed in range(args.seeds)
+        ]
+    elif args.schedule == "chromatic":
+        results = [
+            dcop_gibbs(inst, max_iters=args.iters, beta=args.beta, seed=seed, schedule=args.schedule,
+                       telemetry=telemetry[seed])
+            for seed in range(args.seeds)
+        ]
+    else:
+        results = dcop_gibbs_multichain(
             inst,
+            seeds=list(range(args.seeds)),
             max_iters=args.iters,
             beta=args.beta,
-            seed=seed,
-            schedule=args.schedule
+            schedule=args.schedule,
+            telemetry=telemetry
         )
-        results.append(res)
+    wall_time = time.perf_counter() - start
+    plot_telemetry.close()
+
+    for res in results:
         best_conflicts_all.append(res["conflicts"])
 
         if res["iters_to_zero"] is not None:
@@ -69,7 +118,9 @@ def main():
     print("Runs (seeds):", args.seeds)
     print("Beta:", args.beta)
     print("Max iters:", args.iters)
-    print("Schedule:", args.schedule)
+    print("Schedule:", "hogwild" if args.hogwild else "tempering" if args.replicas else args.schedule)
+    if args.anneal and not args.replicas:
+        print("Annealing:", args.anneal, "from beta", args.beta_start)
 
     print("\nSuccess rate (0 conflicts):", f"{success_count}/{args.seeds} = {success_rate:.2f}")
 
@@ -81,6 +132,19 @@ def main():
     else:
         print("No successful runs reached 0 conflicts within max_iters.")
 
+    print("\nWall time:", f"{wall_time:.3f}s", f"({wall_time / args.seeds:.4f}s per seed)")
+    if "updates_per_sec" in results[0]:
+        print("Throughput (node updates/sec):", round(statistics.mean(r["updates_per_sec"] for r in results)))
+    if args.hogwild:
+        print("Cross-worker neighbor reads:", round(results[0]["staleness"]["cross_worker_reads"], 3))
+        if args.staleness:
+            gaps = [r["staleness"]["conflict_gap"] for r in results]
+            print("Observed conflict gap vs one worker (mean):", round(statistics.mean(gaps), 2))
+    if args.replicas:
+        rates = [r["swap_rate"] for r in results if r["swap_rate"] is not None]
+        if rates:
+            print("Replica swap acceptance:", round(statistics.mean(rates), 3))
+
     print("\nBest conflicts after run (all seeds):")
     print("  mean:", round(statistics.mean(best_conflicts_all), 2))
     print("  min :", min(best_conflicts_all))
@@ -89,7 +153,7 @@ def main():
     # Plot + visualize ONLY for one chosen seed
     plot_seed = args.plot_seed
     if 0 <= plot_seed < args.seeds:
-        hist = results[plot_seed]["history_best"]
+        hist = plot_telemetry.values()
 
         print(f"\nAssignment (seed={plot_seed}):")
         assignment = results[plot_seed]["assignment"]
@@ -106,7 +170,7 @@ def main():
         
         plt.figure()
 
-        iters = list(range(len(hist)))
+        iters = plot_telemetry.steps()
 
         plt.plot(iters, hist,
                 label="DCOP-Gibbs (Best-so-far)",
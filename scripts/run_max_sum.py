@@ -4,7 +4,9 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import matplotlib.pyplot as plt 
 
-from src.dcop.max_sum import load_instance, max_sum
+from src.dcop.max_sum import load_instance, max_sum, settled_iteration
+from src.dcop.render import solution_sink
+from src.dcop.telemetry import add_telemetry_arguments, telemetry_from_args
 
 
 
@@ -13,22 +15,86 @@ def main():
     parser.add_argument("--instance", required=True)
     parser.add_argument("--iters", type=int, default=100)
     parser.add_argument("--damping", type=float, default=0.5)
+    parser.add_argument("--engine", choices=["python", "numpy", "sharded"], default="python")
+    parser.add_argument("--schedule", choices=["sync", "residual", "advp"], default="sync")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default=None,
+                        help="message storage type (numpy and sharded engines only)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (sharded engine only)")
+    parser.add_argument("--profile-memory", action="store_true", help="report peak memory (numpy engine only)")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare the damped synchronous schedule with Max-Sum_ADVP and exit")
+    parser.add_argument("--no-plot", action="store_true", help="skip the solution and convergence plots")
+    add_telemetry_arguments(parser)
     args = parser.parse_args()
 
+    # Only the synchronous array engines take these options; reject the rest up front
+    engine_options = {}
+    for option, value, engines in (("dtype", args.dtype, ("numpy", "sharded")),
+                                   ("profile_memory", args.profile_memory, ("numpy",)),
+                                   ("workers", args.workers, ("sharded",))):
+        if not value:
+            continue
+        flag = "--" + option.replace("_", "-")
+        if args.compare:
+            parser.error(f"{flag} cannot be combined with --compare")
+        if args.engine not in engines or args.schedule != "sync":
+            parser.error(f"{flag} requires --engine {' or '.join(engines)} with the sync schedule")
+        engine_options[option] = value
+
     instance = load_instance(args.instance)
-    result = max_sum(instance, max_iters=args.iters, damping=args.damping)
+
+    if args.compare:
+        # Each schedule streams to its own CSV (--history-csv runs.csv -> runs.sync.csv, runs.advp.csv)
+        sync_telemetry, advp_telemetry = telemetry_from_args(args, "sync"), telemetry_from_args(args, "advp")
+        runs = [
+            (f"sync (damping={args.damping})", sync_telemetry,
+             max_sum(instance, max_iters=args.iters, damping=args.damping, telemetry=sync_telemetry)),
+            ("advp", advp_telemetry,
+             max_sum(instance, max_iters=args.iters, damping=1.0, schedule="advp", telemetry=advp_telemetry)),
+        ]
+        print("\nInstance:", instance.name)
+        print(f"{'schedule':<22}{'iterations':>12}{'settled at':>12}{'conflicts':>11}")
+        for name, series, res in runs:
+            settled = settled_iteration(series.values(), series.steps())
+            print(f"{name:<22}{res['iterations']:>12}{settled:>12}{res['conflicts']:>11}")
+            series.close()
+        if not args.no_plot:
+            plt.figure()
+            for name, series, _ in runs:
+                plt.plot(series.steps(), series.values(), label=name)
+            plt.xlabel("Iteration")
+            plt.ylabel("Conflicts")
+            plt.title(f"Max-Sum vs Max-Sum_ADVP | {instance.name}")
+            plt.legend()
+            plt.show()
+        return
+
+    telemetry = telemetry_from_args(args)
+    result = max_sum(instance, max_iters=args.iters, damping=args.damping,
+                     engine=args.engine, schedule=args.schedule,
+                     sink=None if args.no_plot else solution_sink("Max-Sum"),
+                     telemetry=telemetry, **engine_options)
+    telemetry.close()
 
     print("\nInstance:", instance.name)
     print("Iterations:", result["iterations"])
+    print("Settled at:", settled_iteration(telemetry.values(), telemetry.steps()))
+    if "message_updates" in result:
+        print("Message updates:", result["message_updates"])
+    if "shards" in result:
+        print("Shards:", result["shards"], "| cut edges:", result["cut_edges"])
+    if "memory" in result:
+        for key, value in result["memory"].items():
+            print(f"Memory {key}: {value}")
     print("Assignment:")
     for node, color in result["assignment"].items():
         print(f"  {node}: {color}")
     print("Conflicts:", result["conflicts"])
 
-    hist = result.get("history_conflicts")
-    if hist:
+    hist = telemetry.values()
+    if hist and not args.no_plot:
         plt.figure()
-        plt.plot(range(len(hist)), hist)
+        plt.plot(telemetry.steps(), hist)
         plt.xlabel("Iteration")
         plt.ylabel("Conflicts")
         plt.title("Max-Sum convergence")
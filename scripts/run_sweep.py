@@ -0,0 +1,47 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dcop.max_sum import load_instance
+from src.dcop.sweep import ALGORITHMS, run_sweep, sweep_jobs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instance", required=True, nargs="+")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), nargs="+", default=["gibbs"])
+    parser.add_argument("--params", type=float, nargs="+", default=[2.0],
+                        help="beta values for gibbs, damping values for max_sum")
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds (0..seeds-1)")
+    parser.add_argument("--iters", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    instances = [load_instance(path) for path in args.instance]
+    jobs = sweep_jobs(instances, args.algorithm, args.params, range(args.seeds))
+
+    groups = {}
+    start = time.perf_counter()
+    for done, record in enumerate(run_sweep(instances, jobs, max_iters=args.iters, workers=args.workers), 1):
+        res = record["result"]
+        groups.setdefault((record["instance"], record["algorithm"], record["param"]), []).append(res)
+        if not args.quiet:
+            print(f"[{done}/{len(jobs)}] {record['instance']} {record['algorithm']} "
+                  f"param={record['param']} seed={record['seed']}: "
+                  f"conflicts={res['conflicts']} iterations={res['iterations']}")
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(jobs)} jobs in {elapsed:.2f}s")
+    print(f"{'instance':<14}{'algorithm':<10}{'param':>7}{'runs':>6}{'solved':>8}{'mean conflicts':>16}")
+    for (name, algorithm, param), results in sorted(groups.items()):
+        solved = sum(r["conflicts"] == 0 for r in results)
+        mean_conflicts = statistics.mean(r["conflicts"] for r in results)
+        print(f"{name:<14}{algorithm:<10}{param:>7}{len(results):>6}{solved:>8}{mean_conflicts:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import json
 import random
 
+from src.dcop.message_bus import MessageBus
+from src.dcop.ordering import plan_pseudotree
+
 # --- ΒΟΗΘΗΤΙΚΕΣ ΚΛΑΣΕΙΣ ΚΑΙ ΣΥΝΑΡΤΗΣΕΙΣ ---
 class GraphColoringInstance:
     def __init__(self, name, nodes, edges, colors):
@@ -15,45 +18,6 @@ def load_instance(file_path):
     edges = [tuple(e) for e in data['EDGES']]
     return GraphColoringInstance(data.get('name','Inst'), data['NODES'], edges, data['COLORS'])
 
-def get_neighbors(node, edges):
-    nbrs = []
-    for u, v in edges:
-        if u == node: nbrs.append(v)
-        elif v == node: nbrs.append(u)
-    return nbrs
-
-# --- ΚΑΤΑΣΚΕΥΗ PSEUDO-TREE (Recursive DFS) ---
-def build_pseudotree(nodes, edges, root):
-    parent = {n: None for n in nodes}
-    children = {n: [] for n in nodes}
-    pseudo_parents = {n: [] for n in nodes} 
-    pseudo_children = {n: [] for n in nodes}
-    
-    visited = set()
-
-    def dfs(u, p):
-        visited.add(u)
-        
-        # Tree Edges
-        if p is not None:
-            parent[u] = p
-            children[p].append(u)
-            
-        for v in get_neighbors(u, edges):
-            if v == p:
-                continue 
-            
-            if v in visited:
-                # Back-edges (Πρόγονοι)
-                if v not in pseudo_parents[u]:
-                    pseudo_parents[u].append(v)
-                    pseudo_children[v].append(u) # Σημαντικό για την επικοινωνία
-            else:
-                dfs(v, u)
-
-    dfs(root, None)
-    return parent, children, pseudo_parents, pseudo_children
-
 # --- Η ΚΛΑΣΗ ΤΟΥ ΠΡΑΚΤΟΡΑ ---
 class AdoptAgent:
     def __init__(self, agent_id, domain, parent, children, pseudo_parents, pseudo_children):
@@ -100,63 +64,71 @@ class AdoptAgent:
         
         return best_val, min_cost
 
+# --- ΕΝΑΣ ΓΥΡΟΣ ΕΝΟΣ ΠΡΑΚΤΟΡΑ ---
+def adopt_round(agent, messages, iteration, send):
+    """One lock-step round of an agent: read its messages, decide, send.
+
+    Returns whether it announced a value (a change, or its first one).
+    """
+    # Επεξεργασία
+    for sender, _, msg_type, data in messages:
+        if msg_type == "VALUE":
+            agent.current_context[sender] = data
+        elif msg_type == "COST":
+            agent.costs[sender] = data
+
+    # Απόφαση
+    old_val = agent.value
+    new_val, cost = agent.choose_best_value()
+
+    # Inertia (20% πιθανότητα να μην αλλάξει για να σπάσει ο συγχρονισμός)
+    if new_val != old_val:
+        if random.random() < 0.2:
+            new_val = old_val
+
+    agent.value = new_val
+
+    # Αποστολή
+    announced = new_val != old_val or iteration == 0
+    if announced:
+        for child in agent.children:
+            send(agent.id, child, "VALUE", new_val)
+        for p_child in agent.pseudo_children:
+            send(agent.id, p_child, "VALUE", new_val)
+
+    total_cost = agent.calculate_local_cost(agent.value) + sum(agent.costs.values())
+
+    if agent.parent:
+        send(agent.id, agent.parent, "COST", total_cost)
+    return announced
+
 # --- Ο ΚΥΡΙΟΣ ΑΛΓΟΡΙΘΜΟΣ ---
-def run_adopt(instance, max_iters=100):
+def run_adopt(instance, max_iters=100, ordering="first", ordering_seed=None):
     nodes = instance.nodes
     colors = instance.colors
     edges = instance.edges
     
     # 1. Setup
-    root = nodes[0]
-    parents, children, p_parents, p_children = build_pseudotree(nodes, edges, root)
+    # Pseudo-tree (see src/dcop/ordering.py; "first" roots it at nodes[0])
+    tree = plan_pseudotree(nodes, edges, ordering, seed=ordering_seed, mutual_back_edges=True)
+    parents, children = tree["parent"], tree["children"]
+    p_parents, p_children = tree["pseudo_parents"], tree["pseudo_children"]
     
     agents = {}
     for n in nodes:
         agents[n] = AdoptAgent(n, colors, parents[n], children[n], p_parents[n], p_children[n])
         
-    messages = [] 
+    bus = MessageBus(nodes)
     
     # 2. Main Loop
     for iteration in range(max_iters):
-        current_msgs = messages[:]
-        messages = [] 
+        bus.advance()
         changes = False
         sorted_nodes = nodes 
         
         for agent_id in sorted_nodes:
-            agent = agents[agent_id]
-            my_msgs = [m for m in current_msgs if m[1] == agent_id]
-            
-            # Επεξεργασία
-            for sender, _, msg_type, data in my_msgs:
-                if msg_type == "VALUE":
-                    agent.current_context[sender] = data
-                elif msg_type == "COST":
-                    agent.costs[sender] = data
-            
-            # Απόφαση
-            old_val = agent.value
-            new_val, cost = agent.choose_best_value()
-            
-            # Inertia (20% πιθανότητα να μην αλλάξει για να σπάσει ο συγχρονισμός)
-            if new_val != old_val:
-                if random.random() < 0.2: 
-                    new_val = old_val
-            
-            agent.value = new_val
-            
-            # Αποστολή
-            if new_val != old_val or iteration == 0:
+            if adopt_round(agents[agent_id], bus.receive(agent_id), iteration, bus.send):
                 changes = True
-                for child in agent.children:
-                    messages.append((agent.id, child, "VALUE", new_val))
-                for p_child in agent.pseudo_children:
-                    messages.append((agent.id, p_child, "VALUE", new_val))
-            
-            total_cost = agent.calculate_local_cost(agent.value) + sum(agent.costs.values())
-            
-            if agent.parent:
-                messages.append((agent.id, agent.parent, "COST", total_cost))
 
         if not changes and iteration > 5:
             break
@@ -172,5 +144,21 @@ def run_adopt(instance, max_iters=100):
     return {
         "assignment": assignment,
         "conflicts": conflicts,
-        "iterations": iteration + 1
-    }
\ No newline at end of file
+        "iterations": iteration + 1,
+        "messages": bus.sent,
+        "ordering": tree["ordering"],
+        "width": tree["width"],
+        "depth": tree["depth"]
+    }
+
+
+def run_adopt_async(instance, **options):
+    """ADOPT with one asyncio task per agent and per-link delays (see src/dcop/adopt_async.py)."""
+    from src.dcop.adopt_async import run_adopt_async as run
+    return run(instance, **options)
+
+
+def run_adopt_multiprocess(instance, **options):
+    """ADOPT with its agents placed in worker processes (see src/dcop/adopt_multiprocess.py)."""
+    from src.dcop.adopt_multiprocess import run_adopt_multiprocess as run
+    return run(instance, variant="adopt", **options)
@@ -0,0 +1,220 @@
+import asyncio
+import random
+import time
+
+from src.dcop.adopt import AdoptAgent
+from src.dcop.ordering import plan_pseudotree
+
+
+def constant_delay(seconds):
+    return lambda rng: seconds
+
+
+def uniform_delay(low, high):
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential_delay(mean):
+    return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+class LinkDelays:
+    """Delay distribution per directed link: links maps (sender, recipient) to a distribution, default covers the rest.
+
+    A distribution is a function rng -> seconds (see constant_delay,
+    uniform_delay, exponential_delay) or a number of seconds.
+    """
+
+    def __init__(self, default=None, links=None):
+        self.default = as_distribution(default)
+        self.links = {link: as_distribution(d) for link, d in (links or {}).items()}
+
+    def __call__(self, sender, recipient, rng):
+        return self.links.get((sender, recipient), self.default)(rng)
+
+
+def as_distribution(delay):
+    if delay is None:
+        return constant_delay(0.0)
+    if callable(delay):
+        return delay
+    return constant_delay(float(delay))
+
+
+class Network:
+    """Delivers messages into per-agent asyncio queues after a per-link delay, FIFO on each link.
+
+    Every message in transit or being handled is counted; the network is
+    quiescent when that count drops to zero (agents count their start-up
+    step the same way), which is when the run has terminated. finished is
+    also set once max_messages have been sent.
+    """
+
+    def __init__(self, agents, delays, rng, max_messages=None):
+        self.inboxes = {a: asyncio.Queue() for a in agents}
+        self.delays = delays
+        self.rng = rng
+        self.loop = asyncio.get_running_loop()
+        self.last_arrival = {}
+        self.pending = len(agents)
+        self.quiescent = False
+        self.finished = asyncio.Event()
+        self.max_messages = max_messages
+        self.sent = 0
+        self.sent_by_type = {}
+
+    def send(self, sender, recipient, msg_type, data):
+        self.pending += 1
+        self.sent += 1
+        self.sent_by_type[msg_type] = self.sent_by_type.get(msg_type, 0) + 1
+        if self.max_messages is not None and self.sent >= self.max_messages:
+            self.finished.set()
+        message = (sender, recipient, msg_type, data)
+        delay = self.delays(sender, recipient, self.rng)
+        link = (sender, recipient)
+        arrival = max(self.loop.time() + delay, self.last_arrival.get(link, 0.0))
+        self.last_arrival[link] = arrival
+        if arrival <= self.loop.time():
+            self.inboxes[recipient].put_nowait(message)
+        else:
+            self.loop.call_at(arrival, self.inboxes[recipient].put_nowait, message)
+
+    def handled(self, count):
+        self.pending -= count
+        if self.pending == 0:
+            self.quiescent = True
+            self.finished.set()
+
+
+class Monitor:
+    """Global conflict count, updated as agents change value, and when it last changed."""
+
+    def __init__(self, agents, edges, start):
+        self.agents = agents
+        self.neighbors = {a: [] for a in agents}
+        for u, v in edges:
+            self.neighbors[u].append(v)
+            self.neighbors[v].append(u)
+        self.conflicts = sum(1 for u, v in edges if agents[u].value == agents[v].value)
+        self.best = self.conflicts
+        self.start = start
+        self.changes = 0
+        self.last_change = 0.0
+        self.time_to_zero = 0.0 if self.conflicts == 0 else None
+
+    def changed(self, agent_id, old_value, new_value):
+        for nb in self.neighbors[agent_id]:
+            other = self.agents[nb].value
+            self.conflicts += (other == new_value) - (other == old_value)
+        self.changes += 1
+        self.last_change = time.perf_counter() - self.start
+        self.best = min(self.best, self.conflicts)
+        if self.conflicts == 0 and self.time_to_zero is None:
+            self.time_to_zero = self.last_change
+
+
+def adopt_receive(agent, sender, msg_type, data):
+    if msg_type == "VALUE":
+        agent.current_context[sender] = data
+    elif msg_type == "COST":
+        agent.costs[sender] = data
+
+
+def adopt_react(agent, state, send, monitor):
+    """Re-decide after a batch of messages; sends VALUE only on a change and COST only when it moved.
+
+    Without lock-step rounds there is nothing to break with an inertia coin,
+    but a tie must not move the agent either, or it would never go quiet.
+    """
+    new_val, _ = agent.choose_best_value()
+    old_val = agent.value
+    if new_val != old_val and agent.calculate_local_cost(new_val) < agent.calculate_local_cost(old_val):
+        agent.value = new_val
+        monitor.changed(agent.id, old_val, new_val)
+    if agent.value != state.get("sent_value"):
+        state["sent_value"] = agent.value
+        for child in agent.children:
+            send(agent.id, child, "VALUE", agent.value)
+        for p_child in agent.pseudo_children:
+            send(agent.id, p_child, "VALUE", agent.value)
+    total_cost = agent.calculate_local_cost(agent.value) + sum(agent.costs.values())
+    if agent.parent and total_cost != state.get("sent_cost"):
+        state["sent_cost"] = total_cost
+        send(agent.id, agent.parent, "COST", total_cost)
+
+
+async def agent_task(agent, network, monitor):
+    inbox = network.inboxes[agent.id]
+    state = {}
+    adopt_react(agent, state, network.send, monitor)
+    network.handled(1)
+    while not network.finished.is_set():
+        batch = [await inbox.get()]
+        while not inbox.empty():
+            batch.append(inbox.get_nowait())
+        for sender, _, msg_type, data in batch:
+            adopt_receive(agent, sender, msg_type, data)
+        adopt_react(agent, state, network.send, monitor)
+        network.handled(len(batch))
+
+
+async def adopt_async(instance, delay=None, seed=None, ordering="first", ordering_seed=None, timeout=None,
+                      max_messages=None):
+    """ADOPT with one asyncio task and inbox queue per agent; see run_adopt_async."""
+    nodes = instance.nodes
+    edges = instance.edges
+    tree = plan_pseudotree(nodes, edges, ordering, seed=ordering_seed, mutual_back_edges=True)
+    agents = {n: AdoptAgent(n, instance.colors, tree["parent"][n], tree["children"][n],
+                            tree["pseudo_parents"][n], tree["pseudo_children"][n]) for n in nodes}
+
+    delays = delay if isinstance(delay, LinkDelays) else LinkDelays(delay)
+    network = Network(nodes, delays, random.Random(seed), max_messages)
+    start = time.perf_counter()
+    monitor = Monitor(agents, edges, start)
+    tasks = [asyncio.create_task(agent_task(agents[n], network, monitor)) for n in nodes]
+
+    finished = asyncio.create_task(network.finished.wait())
+    try:
+        done, _ = await asyncio.wait([finished, *tasks], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task is not finished:
+                # An agent can only finish by raising
+                task.result()
+    finally:
+        for task in [finished, *tasks]:
+            task.cancel()
+        await asyncio.gather(finished, *tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    assignment = {n: agents[n].value for n in nodes}
+    return {
+        "assignment": assignment,
+        "conflicts": monitor.conflicts,
+        "best_conflicts": monitor.best,
+        "quiescent": network.quiescent,
+        "elapsed": elapsed,
+        "messages": network.sent,
+        "messages_by_type": dict(network.sent_by_type),
+        "value_changes": monitor.changes,
+        "time_to_solution": monitor.last_change,
+        "time_to_zero": monitor.time_to_zero,
+        "ordering": tree["ordering"],
+        "width": tree["width"],
+        "depth": tree["depth"],
+    }
+
+
+def run_adopt_async(instance, delay=None, seed=None, ordering="first", ordering_seed=None, timeout=None,
+                    max_messages=None):
+    """ADOPT as asynchronous agents: one asyncio task per agent, messages delayed per link.
+
+    delay is a LinkDelays, a distribution for every link (rng -> seconds)
+    or a constant number of seconds; seed drives the delays. Links are FIFO.
+    The run ends at quiescence (no message in transit or being handled), or
+    after timeout seconds or max_messages messages, whichever comes first.
+
+    Reports wall time (elapsed), message counts, time_to_solution (when the
+    final assignment was reached, i.e. the last value change) and
+    time_to_zero (first zero-conflict moment, if any).
+    """
+    return asyncio.run(adopt_async(instance, delay, seed, ordering, ordering_seed, timeout, max_messages))
@@ -1,4 +1,9 @@
 import random
+import sys
+from collections import OrderedDict
+
+from src.dcop.message_bus import MessageBus
+from src.dcop.ordering import plan_pseudotree
 
 # --- ΒΟΗΘΗΤΙΚΕΣ ΚΛΑΣΕΙΣ ---
 class GraphColoringInstance:
@@ -8,47 +13,83 @@ class GraphColoringInstance:
         self.edges = edges
         self.colors = colors
 
-def get_neighbors(node, edges):
-    nbrs = []
-    for u, v in edges:
-        if u == node: nbrs.append(v)
-        elif v == node: nbrs.append(u)
-    return nbrs
-
-def build_pseudotree(nodes, edges, root):
-    parent = {n: None for n in nodes}
-    children = {n: [] for n in nodes}
-    pseudo_parents = {n: [] for n in nodes} 
-    pseudo_children = {n: [] for n in nodes}
-    
-    visited = set()
-    stack = set()
-
-    def dfs(u, p):
-        visited.add(u)
-        stack.add(u)
-        if p is not None:
-            parent[u] = p
-            children[p].append(u)
-            
-        for v in get_neighbors(u, edges):
-            if v == p: continue 
-            if v in visited:
-                if v in stack: # Back-edge
-                    if v not in pseudo_parents[u]:
-                        pseudo_parents[u].append(v)
-                        pseudo_children[v].append(u)
-            else:
-                dfs(v, u)
-        stack.remove(u)
+# --- CACHE ΤΩΝ BOUNDS ---
+def bound_entry_bytes(context_key, bound):
+    """Approximate size of one cached bound: the key tuple, its (agent, value) pairs and the bound."""
+    return sys.getsizeof(context_key) + sum(sys.getsizeof(pair) for pair in context_key) + sys.getsizeof(bound)
+
+
+class BoundsCache:
+    """Upper bound per context, evicting the least recently used contexts past max_entries or max_bytes.
+
+    Reads (get) and writes both count as a use. With no cap it keeps every
+    context, like a plain dict. max_bytes is checked against
+    bound_entry_bytes, which leaves out the dict's own overhead.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, context_key):
+        return context_key in self.entries
+
+    def get(self, context_key, default=None):
+        try:
+            bound = self.entries[context_key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(context_key)
+        self.hits += 1
+        return bound
+
+    def __setitem__(self, context_key, bound):
+        old = self.entries.get(context_key)
+        if old is not None:
+            self.bytes -= bound_entry_bytes(context_key, old)
+            self.entries.move_to_end(context_key)
+        self.entries[context_key] = bound
+        self.bytes += bound_entry_bytes(context_key, bound)
+        self.evict()
+
+    def evict(self):
+        while self.entries and ((self.max_entries is not None and len(self.entries) > self.max_entries)
+                                or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            context_key, bound = self.entries.popitem(last=False)
+            self.bytes -= bound_entry_bytes(context_key, bound)
+            self.evictions += 1
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
 
-    dfs(root, None)
-    return parent, children, pseudo_parents, pseudo_children
 
+def bounds_summary(caches):
+    """Counters of the agents' BoundsCaches, summed, with the overall hit rate and the largest cache."""
+    summary = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "max_entries": 0, "max_bytes": 0}
+    for cache in caches:
+        stats = cache.stats() if isinstance(cache, BoundsCache) else cache
+        for key in ("entries", "bytes", "hits", "misses", "evictions"):
+            summary[key] += stats[key]
+        summary["max_entries"] = max(summary["max_entries"], stats["entries"])
+        summary["max_bytes"] = max(summary["max_bytes"], stats["bytes"])
+    lookups = summary["hits"] + summary["misses"]
+    summary["hit_rate"] = summary["hits"] / lookups if lookups else 0.0
+    return summary
 
 # --- ΠΡΑΚΤΟΡΑΣ BnB (ΔΙΟΡΘΩΜΕΝΟΣ) ---
 class AdoptBnBAgent:
-    def __init__(self, agent_id, domain, parent, children, pseudo_parents, pseudo_children):
+    def __init__(self, agent_id, domain, parent, children, pseudo_parents, pseudo_children,
+                 bounds_cap=None, bounds_bytes=None):
         self.id = agent_id
         self.domain = domain 
         self.value = random.choice(domain)
@@ -59,7 +100,7 @@ class AdoptBnBAgent:
         
         self.current_context = {} 
         self.child_costs = {child: {val: 0 for val in domain} for child in children} 
-        self.bounds = {}
+        self.bounds = BoundsCache(bounds_cap, bounds_bytes)
 
     def calculate_local_cost(self, val):
         cost = 0
@@ -111,54 +152,65 @@ class AdoptBnBAgent:
         return best_val, min_lb
 
 
+def bnb_receive(agent, messages):
+    for sender, _, msg_type, data in messages:
+        if msg_type == "VALUE":
+            agent.current_context[sender] = data
+        elif msg_type == "COST":
+            parent_color, cost_val = data
+            agent.child_costs[sender][parent_color] = cost_val
+
+
+def bnb_round(agent, iteration, send):
+    """Decide and send, after every agent has read its messages. Returns whether the value changed."""
+    old_val = agent.value
+    new_val, min_lb = agent.choose_best_value()
+
+    changed = False
+    if new_val != old_val:
+        if random.random() < 0.1: new_val = old_val
+        else: changed = True
+
+    agent.value = new_val
+
+    if new_val != old_val or iteration == 0:
+        for child in agent.children:
+            send(agent.id, child, "VALUE", new_val)
+        for p_child in agent.pseudo_children:
+            send(agent.id, p_child, "VALUE", new_val)
+
+    if agent.parent:
+        parent_color = agent.current_context.get(agent.parent)
+        if parent_color:
+            # Αλλαγή: Στέλνουμε το ΠΡΑΓΜΑΤΙΚΟ min_lb που βρήκαμε
+            send(agent.id, agent.parent, "COST", (parent_color, min_lb))
+    return changed
+
+
 # --- Η ΣΥΝΑΡΤΗΣΗ ΕΠΙΛΥΣΗΣ (SOLVER) ---
-def solve_adopt_bnb(instance, max_iters=2000):
+def solve_adopt_bnb(instance, max_iters=2000, ordering="first", ordering_seed=None, bounds_cap=None,
+                    bounds_bytes=None):
+    # bounds_cap / bounds_bytes: όριο (contexts / bytes) στην LRU cache των bounds κάθε πράκτορα
     nodes = instance.nodes
     edges = instance.edges
     
-    root = nodes[0]
-    parents, children, p_parents, p_children = build_pseudotree(nodes, edges, root)
+    tree = plan_pseudotree(nodes, edges, ordering, seed=ordering_seed)
+    parents, children = tree["parent"], tree["children"]
+    p_parents, p_children = tree["pseudo_parents"], tree["pseudo_children"]
     
-    agents = {n: AdoptBnBAgent(n, instance.colors, parents[n], children[n], p_parents[n], p_children[n]) for n in nodes}
-    messages = [] 
+    agents = {n: AdoptBnBAgent(n, instance.colors, parents[n], children[n], p_parents[n], p_children[n],
+                               bounds_cap, bounds_bytes) for n in nodes}
+    bus = MessageBus(nodes)
     
     for iteration in range(max_iters):
-        current_msgs = messages[:]
-        messages = [] 
+        bus.advance()
         
         for agent_id in nodes:
-            agent = agents[agent_id]
-            incoming = [m for m in current_msgs if m[1] == agent_id]
-            for sender, _, msg_type, data in incoming:
-                if msg_type == "VALUE":
-                    agent.current_context[sender] = data
-                elif msg_type == "COST":
-                    parent_color, cost_val = data
-                    agent.child_costs[sender][parent_color] = cost_val
+            bnb_receive(agents[agent_id], bus.receive(agent_id))
         
         changes = 0
         for agent_id in nodes:
-            agent = agents[agent_id]
-            old_val = agent.value
-            new_val, min_lb = agent.choose_best_value()
-            
-            if new_val != old_val:
-                if random.random() < 0.1: new_val = old_val
-                else: changes += 1
-            
-            agent.value = new_val
-            
-            if new_val != old_val or iteration == 0:
-                for child in agent.children:
-                    messages.append((agent.id, child, "VALUE", new_val))
-                for p_child in agent.pseudo_children:
-                    messages.append((agent.id, p_child, "VALUE", new_val))
-            
-            if agent.parent:
-                parent_color = agent.current_context.get(agent.parent)
-                if parent_color: 
-                    # Αλλαγή: Στέλνουμε το ΠΡΑΓΜΑΤΙΚΟ min_lb που βρήκαμε
-                    messages.append((agent.id, agent.parent, "COST", (parent_color, min_lb)))
+            changes += bnb_round(agents[agent_id], iteration, bus.send)
                 
     assignment = {a_id: agents[a_id].value for a_id in agents}
     conflicts = 0
@@ -169,5 +221,16 @@ def solve_adopt_bnb(instance, max_iters=2000):
     return {
         "assignment": assignment,
         "conflicts": conflicts,
-        "iterations": max_iters
-    }
\ No newline at end of file
+        "iterations": max_iters,
+        "messages": bus.sent,
+        "ordering": tree["ordering"],
+        "width": tree["width"],
+        "depth": tree["depth"],
+        "bounds": bounds_summary(agent.bounds for agent in agents.values())
+    }
+
+
+def solve_adopt_bnb_multiprocess(instance, **options):
+    """BnB-ADOPT with its agents placed in worker processes (see src/dcop/adopt_multiprocess.py)."""
+    from src.dcop.adopt_multiprocess import run_adopt_multiprocess as run
+    return run(instance, variant="bnb", **options)
@@ -0,0 +1,223 @@
+import multiprocessing as mp
+import pickle
+import random
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from src.dcop.adopt import AdoptAgent, adopt_round
+from src.dcop.adopt_bnb import AdoptBnBAgent, bnb_receive, bnb_round, bounds_summary
+from src.dcop.message_bus import MessageBus
+from src.dcop.ordering import plan_pseudotree
+
+VARIANTS = {
+    "adopt": {"agent": AdoptAgent, "max_iters": 100, "mutual_back_edges": True},
+    "bnb": {"agent": AdoptBnBAgent, "max_iters": 2000, "mutual_back_edges": False},
+}
+
+
+def place_agents(nodes, tree, workers, placement="tree"):
+    """Worker of every agent.
+
+    "tree" cuts the DFS order of the pseudo-tree into contiguous, equal
+    blocks, so subtrees (and most parent/child traffic) stay in one worker;
+    "round_robin" deals agents out in node order. A dict is used as given.
+    """
+    if isinstance(placement, dict):
+        return dict(placement)
+    n = len(nodes)
+    if placement == "tree":
+        return {node: i * workers // n for i, node in enumerate(tree["order"])}
+    if placement == "round_robin":
+        return {node: i % workers for i, node in enumerate(nodes)}
+    raise ValueError(f"Unknown placement: {placement}")
+
+
+def adopt_worker(conn, w, variant, colors, specs, owner, seed, agent_options):
+    try:
+        run_worker(conn, w, variant, colors, specs, owner, seed, agent_options)
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def run_worker(conn, w, variant, colors, specs, owner, seed, agent_options):
+    # Forked workers would otherwise share the parent's random state
+    random.seed(None if seed is None else f"{seed}-{w}")
+    agent_cls = VARIANTS[variant]["agent"]
+    ids = [spec[0] for spec in specs]
+    agents = {spec[0]: agent_cls(spec[0], colors, *spec[1:], **agent_options) for spec in specs}
+    bus = MessageBus(ids)
+    outgoing = {}
+    local = 0
+
+    def send(sender, recipient, msg_type, data):
+        nonlocal local
+        dest = owner[recipient]
+        if dest == w:
+            bus.send(sender, recipient, msg_type, data)
+            local += 1
+        else:
+            outgoing.setdefault(dest, []).append((sender, recipient, msg_type, data))
+
+    while True:
+        command, payload = conn.recv()
+        if command == "round":
+            iteration, blobs = payload
+            # Messages other workers sent last round join this worker's own before delivery
+            for blob in blobs:
+                for message in pickle.loads(blob):
+                    bus.send(*message)
+            bus.advance()
+            if variant == "adopt":
+                changes = 0
+                for a in ids:
+                    changes += adopt_round(agents[a], bus.receive(a), iteration, send)
+            else:
+                for a in ids:
+                    bnb_receive(agents[a], bus.receive(a))
+                changes = 0
+                for a in ids:
+                    changes += bnb_round(agents[a], iteration, send)
+            batches = {dest: pickle.dumps(messages, pickle.HIGHEST_PROTOCOL) for dest, messages in outgoing.items()}
+            counts = {dest: len(messages) for dest, messages in outgoing.items()}
+            outgoing.clear()
+            conn.send((changes, batches, counts))
+        elif command == "values":
+            bounds = [agents[a].bounds.stats() for a in ids] if variant == "bnb" else []
+            conn.send(({a: agents[a].value for a in ids}, local, bounds))
+        else:
+            break
+
+
+class WorkerPool:
+    """Agent-hosting worker processes, one pipe each, driven round by round."""
+
+    def __init__(self, variant, colors, groups, owner, seed, agent_options=None):
+        ctx = mp.get_context()
+        self.conns = []
+        self.procs = []
+        for w, specs in enumerate(groups):
+            parent, child = ctx.Pipe()
+            args = (child, w, variant, colors, specs, owner, seed, agent_options or {})
+            proc = ctx.Process(target=adopt_worker, args=args)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def gather(self):
+        """One reply per worker, read in whatever order they arrive."""
+        replies = [None] * len(self.conns)
+        waiting = {conn: w for w, conn in enumerate(self.conns)}
+        while waiting:
+            for conn in wait(list(waiting)):
+                reply = conn.recv()
+                if isinstance(reply, tuple) and reply and reply[0] == "error":
+                    self.close()
+                    raise RuntimeError(f"ADOPT worker {waiting[conn]} failed:\n{reply[1]}")
+                replies[waiting.pop(conn)] = reply
+        return replies
+
+    def broadcast(self, command, payloads):
+        for conn, payload in zip(self.conns, payloads):
+            conn.send((command, payload))
+        return self.gather()
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc in self.procs:
+            proc.join()
+
+
+def run_adopt_multiprocess(instance, variant="adopt", max_iters=None, workers=None, placement="tree",
+                           ordering="first", ordering_seed=None, seed=None, bounds_cap=None, bounds_bytes=None):
+    """Lock-step ADOPT or BnB-ADOPT with the agents spread over worker processes.
+
+    Each worker hosts a group of agents (see place_agents) behind its own
+    MessageBus. Messages between its agents stay in-process; the rest are
+    pickled per destination worker and shipped through the workers' pipes
+    to the parent, which forwards them with the next round and acts as the
+    round barrier. Rounds keep the single-process semantics (a message sent
+    in round t is read in round t+1), and the stopping rule is the same.
+
+    Reports message volume and serialized bytes per (worker, worker) link,
+    local vs remote message counts and wall time. For BnB-ADOPT,
+    bounds_cap / bounds_bytes cap every agent's bounds cache (see
+    BoundsCache) and its counters are reported under "bounds".
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown ADOPT variant: {variant}")
+    spec = VARIANTS[variant]
+    max_iters = spec["max_iters"] if max_iters is None else max_iters
+    nodes = instance.nodes
+    edges = instance.edges
+    workers = max(1, min(workers or mp.cpu_count() or 1, len(nodes)))
+    agent_options = {"bounds_cap": bounds_cap, "bounds_bytes": bounds_bytes} if variant == "bnb" else {}
+
+    tree = plan_pseudotree(nodes, edges, ordering, seed=ordering_seed, mutual_back_edges=spec["mutual_back_edges"])
+    owner = place_agents(nodes, tree, workers, placement)
+    groups = [[] for _ in range(workers)]
+    for n in nodes:
+        groups[owner[n]].append((n, tree["parent"][n], tree["children"][n], tree["pseudo_parents"][n],
+                                 tree["pseudo_children"][n]))
+
+    links = {}
+    start = time.perf_counter()
+    pool = WorkerPool(variant, instance.colors, groups, owner, seed, agent_options)
+    try:
+        inbound = [[] for _ in range(workers)]
+        for iteration in range(max_iters):
+            replies = pool.broadcast("round", [(iteration, blobs) for blobs in inbound])
+            inbound = [[] for _ in range(workers)]
+            changes = 0
+            for w, (worker_changes, batches, counts) in enumerate(replies):
+                changes += worker_changes
+                for dest, blob in batches.items():
+                    inbound[dest].append(blob)
+                    link = links.setdefault((w, dest), {"messages": 0, "bytes": 0})
+                    link["messages"] += counts[dest]
+                    link["bytes"] += len(blob)
+            if variant == "adopt" and not changes and iteration > 5:
+                break
+        finals = pool.broadcast("values", [None] * workers)
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    assignment = {}
+    local = 0
+    bounds = []
+    for values, worker_local, worker_bounds in finals:
+        assignment.update(values)
+        local += worker_local
+        bounds.extend(worker_bounds)
+    assignment = {n: assignment[n] for n in nodes}
+    conflicts = sum(1 for u, v in edges if assignment[u] == assignment[v])
+    remote = sum(link["messages"] for link in links.values())
+
+    return {
+        "assignment": assignment,
+        "conflicts": conflicts,
+        "iterations": iteration + 1 if max_iters else 0,
+        "variant": variant,
+        "workers": workers,
+        "placement": placement if isinstance(placement, str) else "custom",
+        "messages": local + remote,
+        "local_messages": local,
+        "remote_messages": remote,
+        "remote_share": remote / (local + remote) if local + remote else 0.0,
+        "bytes_serialized": sum(link["bytes"] for link in links.values()),
+        "links": dict(sorted(links.items())),
+        "elapsed": elapsed,
+        "ordering": tree["ordering"],
+        "width": tree["width"],
+        "depth": tree["depth"],
+        "bounds": bounds_summary(bounds) if variant == "bnb" else None,
+    }
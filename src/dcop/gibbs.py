@@ -1,8 +1,11 @@
 import random
 import math
+import time
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
 from src.dcop.max_sum import build_neighbors, load_instance
+from src.dcop.telemetry import telemetry_for
 
 
 def visualize_solution(instance, assignment, title):
@@ -39,16 +42,30 @@ def compute_conflicts(edges, assignment_index):
     return conflicts
 
 
-def local_cost(node, color_idx, neighbors, assignment_index):
-    cost = 0
+def neighbor_color_counts(nodes, neighbors, assignment_index, k):
+    # counts[node][c] = number of neighbors of node currently colored c
+    counts = {n: [0] * k for n in nodes}
+    for n in nodes:
+        for nb in neighbors[n]:
+            counts[n][assignment_index[nb]] += 1
+    return counts
+
+
+def recolor(node, new_color, neighbors, assignment_index, counts):
+    """Give node a new color in O(deg) and return the change in the global conflict count."""
+    old_color = assignment_index[node]
+    if new_color == old_color:
+        return 0
+    delta = counts[node][new_color] - counts[node][old_color]
     for nb in neighbors[node]:
-        if assignment_index[nb] == color_idx:
-            cost += 1
-    return cost
+        counts[nb][old_color] -= 1
+        counts[nb][new_color] += 1
+    assignment_index[node] = new_color
+    return delta
 
 
-def sample_from_probs(probs):
-    r = random.random()
+def sample_from_probs(probs, rng=random):
+    r = rng.random()
     s = 0
     for i, p in enumerate(probs):
         s += p
@@ -57,8 +74,127 @@ def sample_from_probs(probs):
     return len(probs) - 1
 
 
-def dcop_gibbs(instance, max_iters=50, beta=2, seed=10, schedule="random"):
-    random.seed(seed)
+class BestJournal:
+    """Best-so-far assignment kept as an undo log of the moves made since it was reached.
+
+    Reaching a new best only clears the log; the best assignment is rebuilt
+    once, by undoing the log on a copy of the current one. When the log grows
+    past cap it is compacted into a snapshot of the best assignment, after
+    which moves are not logged until the next improvement.
+    """
+
+    def __init__(self, assignment_index, cap=None):
+        self.current = assignment_index
+        self.cap = len(assignment_index) if cap is None else cap
+        self.log = []
+        self.snapshot = None
+        self.compactions = 0
+
+    def record(self, node, old_color):
+        if self.snapshot is not None:
+            return
+        self.log.append((node, old_color))
+        if len(self.log) > self.cap:
+            self.snapshot = self.rebuild()
+            self.log = []
+            self.compactions += 1
+
+    def improved(self):
+        self.log = []
+        self.snapshot = None
+
+    def rebuild(self):
+        if self.snapshot is not None:
+            return dict(self.snapshot)
+        best = dict(self.current)
+        for node, old_color in reversed(self.log):
+            best[node] = old_color
+        return best
+
+
+class BoltzmannSampler:
+    """Draws a color with probability proportional to exp(-beta * cost) from integer costs.
+
+    Costs are neighbor counts, shifted by the row minimum so weights never
+    underflow. While beta holds still, exp(-beta * c) comes from a table over
+    0..max_cost; while it moves (annealing) only the k costs of the row are
+    exponentiated, since a table per step would cost O(max degree). Uniforms
+    are drawn in blocks from a generator seeded by rng.
+    """
+
+    def __init__(self, rng, max_cost, block=4096):
+        self.generator = np.random.default_rng(rng.getrandbits(64))
+        self.max_cost = max_cost
+        self.block = block
+        self.uniforms = []
+        self.pos = 0
+        self.beta = None
+        self.table = []
+        self.last_beta = None
+
+    def uniform(self):
+        if self.pos == len(self.uniforms):
+            self.uniforms = self.generator.random(self.block).tolist()
+            self.pos = 0
+        u = self.uniforms[self.pos]
+        self.pos += 1
+        return u
+
+    def sample(self, costs, beta):
+        low = min(costs)
+        if beta != self.beta:
+            if beta != self.last_beta:
+                # beta is still changing: weigh just this row
+                self.last_beta = beta
+                weights = [math.exp(-beta * (c - low)) for c in costs]
+                target = self.uniform() * sum(weights)
+                for color, w in enumerate(weights):
+                    target -= w
+                    if target < 0:
+                        return color
+                return len(costs) - 1
+            self.beta = beta
+            self.table = [math.exp(-beta * c) for c in range(self.max_cost + 1)]
+        table = self.table
+        total = 0.0
+        for c in costs:
+            total += table[c - low]
+        target = self.uniform() * total
+        for color, c in enumerate(costs):
+            target -= table[c - low]
+            if target < 0:
+                return color
+        return len(costs) - 1
+
+
+def beta_schedule(anneal, beta, max_iters, beta_start=0.1):
+    """beta at step t: fixed, or ramped from beta_start up to beta over max_iters steps."""
+    last = max(1, max_iters - 1)
+    if anneal is None or anneal == "constant":
+        return lambda t: beta
+    if anneal == "linear":
+        return lambda t: beta_start + (beta - beta_start) * min(t, last) / last
+    if anneal == "geometric":
+        if beta_start <= 0 or beta <= 0:
+            raise ValueError("The geometric schedule needs positive betas")
+        ratio = beta / beta_start
+        return lambda t: beta_start * ratio ** (min(t, last) / last)
+    if callable(anneal):
+        return anneal
+    raise ValueError(f"Unknown beta schedule: {anneal}")
+
+
+def dcop_gibbs(instance, max_iters=50, beta=2, seed=10, schedule="random", anneal=None, beta_start=0.1,
+               journal_cap=None, telemetry=None):
+    if schedule == "chromatic":
+        if anneal is not None:
+            raise ValueError("Annealing is not available with the chromatic schedule")
+        from src.dcop.gibbs_numpy import gibbs_chromatic
+        return gibbs_chromatic(instance, max_iters=max_iters, beta=beta, seed=seed, telemetry=telemetry)
+
+    # A private stream per call, so concurrent runs cannot disturb each other
+    rng = random.Random(seed)
+    beta_at = beta_schedule(anneal, beta, max_iters, beta_start)
 
     nodes = instance.nodes
     edges = instance.edges
@@ -67,38 +203,43 @@ def dcop_gibbs(instance, max_iters=50, beta=2, seed=10, schedule="random"):
 
     neighbors = build_neighbors(nodes, edges)
 
-    assignment_index = {n: random.randrange(k) for n in nodes}
-    best_assignment_index = dict(assignment_index)
-    best_conflicts = compute_conflicts(edges, assignment_index)
-    history_best = [best_conflicts]
+    assignment_index = {n: rng.randrange(k) for n in nodes}
+    sampler = BoltzmannSampler(rng, max((len(nb) for nb in neighbors.values()), default=0))
+    counts = neighbor_color_counts(nodes, neighbors, assignment_index, k)
+    curr_conflicts = compute_conflicts(edges, assignment_index)
+    best = BestJournal(assignment_index, journal_cap)
+    best_conflicts = curr_conflicts
+    telemetry = telemetry_for(telemetry)
+    telemetry.record(0, best_conflicts)
     iters_to_zero = None
 
+    start = time.perf_counter()
+    t = -1
     for t in range(max_iters):
 
         if schedule == "round_robin":
             node = nodes[t % len(nodes)]
         else:
-            node = random.choice(nodes)
-
-        costs = [local_cost(node, c, neighbors, assignment_index) for c in range(k)]
-        weights = [math.exp(-beta * cost) for cost in costs]
-        Z = sum(weights)
-        probs = [w / Z for w in weights] if Z > 0 else [1 / k] * k
+            node = rng.choice(nodes)
 
-        new_color = sample_from_probs(probs)
-        assignment_index[node] = new_color
+        new_color = sampler.sample(counts[node], beta_at(t))
+        old_color = assignment_index[node]
+        if new_color != old_color:
+            curr_conflicts += recolor(node, new_color, neighbors, assignment_index, counts)
+            best.record(node, old_color)
 
-        curr_conflicts = compute_conflicts(edges, assignment_index)
         if curr_conflicts < best_conflicts:
             best_conflicts = curr_conflicts
-            best_assignment_index = dict(assignment_index)
+            best.improved()
 
-        history_best.append(best_conflicts)
+        telemetry.record(t + 1, best_conflicts)
 
         if best_conflicts == 0 and iters_to_zero is None:
             iters_to_zero = t + 1
             break
+    elapsed = time.perf_counter() - start
 
+    best_assignment_index = best.rebuild()
     assignment = {n: colors[best_assignment_index[n]] for n in nodes}
 
     return {
@@ -107,23 +248,30 @@ def dcop_gibbs(instance, max_iters=50, beta=2, seed=10, schedule="random"):
         "iterations": t + 1,
         "beta": beta,
         "schedule": schedule,
+        "anneal": anneal if anneal is None or isinstance(anneal, str) else "custom",
         "seed": seed,
         "iters_to_zero": iters_to_zero,
-        "history_best": history_best,
+        "history_best": telemetry.finish().values(),
+        "updates_per_sec": (t + 1) / elapsed if elapsed > 0 else float("inf"),
+        "elapsed": elapsed,
+        "journal_compactions": best.compactions,
     }
 
 
+def dcop_gibbs_multichain(instance, seeds, max_iters=50, beta=2, schedule="random", **engine_options):
+    """Run one chain per seed as a single vectorized batch; returns one result per seed."""
+    from src.dcop.gibbs_numpy import gibbs_multichain
+    return gibbs_multichain(instance, seeds, max_iters=max_iters, beta=beta, schedule=schedule,
+                            **engine_options)
 
 
+def dcop_gibbs_tempering(instance, max_iters=50, seed=10, **options):
+    """Parallel-tempering DCOP-Gibbs (see src/dcop/gibbs_tempering.py)."""
+    from src.dcop.gibbs_tempering import dcop_gibbs_tempering as run
+    return run(instance, max_iters=max_iters, seed=seed, **options)
 
 
-
-
-
-
-
-
-
-
-   
-
+def dcop_gibbs_hogwild(instance, max_iters=50, beta=2, seed=10, **options):
+    """Multi-process lock-free DCOP-Gibbs on a shared assignment (see src/dcop/gibbs_hogwild.py)."""
+    from src.dcop.gibbs_hogwild import dcop_gibbs_hogwild as run
+    return run(instance, max_iters=max_iters, beta=beta, seed=seed, **options)
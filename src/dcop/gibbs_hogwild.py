@@ -0,0 +1,255 @@
+import multiprocessing as mp
+import random
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.dcop.gibbs import BoltzmannSampler
+from src.dcop.max_sum_numpy import EdgeIndex, count_conflicts
+from src.dcop.max_sum_sharded import partition_nodes
+from src.dcop.telemetry import telemetry_for
+
+# Per-worker slots of the shared stats table; its last row holds the stop flag
+# (set by the parent only), the worker (plus one) that captured a zero-conflict
+# snapshot and the published update count at that moment. OBSERVED is the
+# lowest exact count a worker has seen at its syncs (kept only when observing).
+UPDATES, CONFLICTS, DONE, OBSERVED = 0, 1, 2, 3
+STOP, FOUND, FOUND_AT = 0, 1, 2
+
+
+def attach_array(name, dtype, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def hogwild_worker(w, names, n, workers, owned, adjacency, edge_u, edge_v, all_u, all_v, k, beta, budget, seed,
+                   sync_every, observe, capture, errors):
+    try:
+        run_worker(w, names, n, workers, owned, adjacency, edge_u, edge_v, all_u, all_v, k, beta, budget, seed,
+                   sync_every, observe, capture)
+    except Exception:
+        errors.put((w, traceback.format_exc()))
+
+
+def run_worker(w, names, n, workers, owned, adjacency, edge_u, edge_v, all_u, all_v, k, beta, budget, seed,
+               sync_every, observe, capture):
+    assignment_shm, assignment = attach_array(names[0], np.int64, (n,))
+    stats_shm, stats = attach_array(names[1], np.int64, (workers + 1, 4))
+    found_shm, found = attach_array(names[2], np.int64, (n,))
+    # Scalar reads and writes through a memoryview are far cheaper than numpy indexing
+    shared = assignment_shm.buf.cast("q")
+    try:
+        rng = random.Random(seed)
+        sampler = BoltzmannSampler(rng, max((len(nb) for nb in adjacency), default=0))
+        choose = rng.randrange
+        m = len(owned)
+        if not m:
+            budget = 0
+
+        updates = 0
+        while updates < budget and not stats[workers, STOP]:
+            steps = min(sync_every, budget - updates)
+            for _ in range(steps):
+                i = choose(m)
+                costs = [0] * k
+                for v in adjacency[i]:
+                    costs[shared[v]] += 1
+                shared[owned[i]] = sampler.sample(costs, beta)
+            updates += steps
+            # Periodic merge: conflicts on the edges this worker owns, read from the shared state
+            stats[w, UPDATES] = updates
+            stats[w, CONFLICTS] = np.count_nonzero(assignment[edge_u] == assignment[edge_v])
+            exact = None
+            if observe:
+                snapshot = assignment.copy()
+                exact = np.count_nonzero(snapshot[all_u] == snapshot[all_v])
+                stats[w, OBSERVED] = min(stats[w, OBSERVED], exact)
+            # Zero states are short-lived, so the worker that sees every published count
+            # at zero checks a copy of the assignment itself. The counts were read at
+            # different moments, so only an exact recount may be captured, and only the
+            # parent, after recounting the capture again, stops the run.
+            if not stats[:workers, CONFLICTS].any() and not stats[workers, FOUND]:
+                if exact is None:
+                    snapshot = assignment.copy()
+                    exact = np.count_nonzero(snapshot[all_u] == snapshot[all_v])
+                if not exact:
+                    with capture:
+                        if not stats[workers, FOUND]:
+                            found[:] = snapshot
+                            stats[workers, FOUND_AT] = stats[:workers, UPDATES].sum()
+                            stats[workers, FOUND] = w + 1
+        stats[w, DONE] = 1
+    finally:
+        # Views must be released before the segments can be closed
+        shared.release()
+        assignment = stats = found = None
+        assignment_shm.close()
+        stats_shm.close()
+        found_shm.close()
+
+
+def dcop_gibbs_hogwild(instance, max_iters=50, beta=2, seed=10, workers=None, sync_every=None,
+                       poll=0.01, measure_staleness=False, observe=False, telemetry=None):
+    """Hogwild DCOP-Gibbs: workers resample disjoint node sets against one shared assignment.
+
+    The assignment lives in a shared_memory int64 array. Every worker owns a
+    block of nodes (balanced, low-cut partition) and takes max_iters / workers
+    random-scan updates on them without locking, so neighbor colors owned by
+    other workers may be read mid-change. Every sync_every updates (by default
+    as many as the worker owns edges, which keeps the recount amortised O(1))
+    a worker publishes the conflicts on its edges; the parent polls these,
+    keeps the best exact snapshot and stops everyone once one recounts to zero.
+
+    Staleness is reported as the share of neighbor reads that cross workers.
+    With observe, every worker also recounts a copy of the whole assignment
+    at each sync and the lowest count seen is reported as observed_best;
+    measure_staleness adds a one-worker run of the same length, seed and
+    sync cadence, observed the same way, and conflict_gap is the difference
+    between the two.
+    """
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+
+    graph = EdgeIndex(nodes, instance.edges)
+    n = graph.n
+    workers = max(1, min(workers or mp.cpu_count() or 1, max(1, n)))
+    part = partition_nodes(graph, workers)
+    # Only parts that received nodes get a worker
+    used = np.unique(part)
+    part = np.searchsorted(used, part)
+    workers = max(1, len(used))
+    telemetry = telemetry_for(telemetry)
+    observe = observe or measure_staleness
+    # Observed runs share one sync cadence, so a one-worker run is observed as often
+    cadence = sync_every or max(64, len(graph.edge_u) // workers)
+
+    rng = np.random.default_rng(seed)
+    start_assignment = rng.integers(k, size=n)
+
+    ctx = mp.get_context()
+    assignment_shm = shared_memory.SharedMemory(create=True, size=max(1, n) * 8)
+    stats_shm = shared_memory.SharedMemory(create=True, size=(workers + 1) * 4 * 8)
+    found_shm = shared_memory.SharedMemory(create=True, size=max(1, n) * 8)
+    procs = []
+    assignment = stats = found = None
+    try:
+        assignment = np.ndarray((n,), dtype=np.int64, buffer=assignment_shm.buf)
+        stats = np.ndarray((workers + 1, 4), dtype=np.int64, buffer=stats_shm.buf)
+        found = np.ndarray((n,), dtype=np.int64, buffer=found_shm.buf)
+        assignment[:] = start_assignment
+        stats[:] = 0
+        # Until a worker has published, its count is unknown rather than zero
+        stats[:workers, CONFLICTS] = 1
+
+        best_assignment = assignment.copy()
+        best_conflicts = count_conflicts(graph, best_assignment)
+        stats[:workers, OBSERVED] = best_conflicts
+        telemetry.record(0, best_conflicts)
+
+        budgets = [max_iters // workers + (1 if w < max_iters % workers else 0) for w in range(workers)]
+        errors = ctx.Queue()
+        capture = ctx.Lock()
+        names = (assignment_shm.name, stats_shm.name, found_shm.name)
+        for w in range(workers):
+            owned = np.flatnonzero(part == w)
+            adjacency = [graph.dst[graph.starts[u]:graph.starts[u] + graph.degree[u]].tolist() for u in owned]
+            mine = part[graph.edge_u] == w
+            every = cadence if observe else sync_every or max(64, int(mine.sum()))
+            args = (w, names, n, workers, owned.tolist(), adjacency, graph.edge_u[mine], graph.edge_v[mine],
+                    graph.edge_u, graph.edge_v, k, beta, budgets[w], f"{seed}-{w}", every, observe, capture, errors)
+            procs.append(ctx.Process(target=hogwild_worker, args=args))
+
+        start = time.perf_counter()
+        iters_to_zero = 0 if best_conflicts == 0 else None
+        time_to_zero = 0.0 if best_conflicts == 0 else None
+        if best_conflicts == 0:
+            stats[workers, STOP] = 1
+        for proc in procs:
+            proc.start()
+
+        merged_estimate = best_conflicts
+        while True:
+            finished = all(not proc.is_alive() for proc in procs)
+            updates = int(stats[:workers, UPDATES].sum())
+            merged_estimate = int(stats[:workers, CONFLICTS].sum()) if updates else merged_estimate
+            # The estimate is assembled from per-worker reads at different times;
+            # only an exact recount of a snapshot may become the best assignment.
+            candidates = []
+            if merged_estimate < best_conflicts or finished:
+                candidates.append((assignment.copy(), updates))
+            captured = stats[workers, FOUND] and iters_to_zero is None
+            if captured:
+                candidates.append((found.copy(), int(stats[workers, FOUND_AT])))
+            for snapshot, step in candidates:
+                exact = count_conflicts(graph, snapshot)
+                if exact < best_conflicts:
+                    best_conflicts, best_assignment = exact, snapshot
+                    if exact == 0 and iters_to_zero is None:
+                        iters_to_zero = step
+                        time_to_zero = time.perf_counter() - start
+                        stats[workers, STOP] = 1
+            if captured and iters_to_zero is None:
+                # The capture was not a solution after all: let the workers capture again
+                stats[workers, FOUND] = 0
+            telemetry.record(updates, best_conflicts)
+            if finished:
+                break
+            time.sleep(poll)
+        elapsed = time.perf_counter() - start
+
+        for proc in procs:
+            proc.join()
+        if not errors.empty():
+            w, tb = errors.get()
+            raise RuntimeError(f"Hogwild worker {w} failed:\n{tb}")
+        updates = int(stats[:workers, UPDATES].sum())
+        observed = int(stats[:workers, OBSERVED].min())
+    finally:
+        assignment = stats = found = None
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        assignment_shm.close()
+        assignment_shm.unlink()
+        stats_shm.close()
+        stats_shm.unlink()
+        found_shm.close()
+        found_shm.unlink()
+
+    cross = int(np.count_nonzero(part[graph.src] != part[graph.dst]))
+    staleness = {
+        "cross_worker_reads": cross / graph.num_directed if graph.num_directed else 0.0,
+        "cut_edges": cross // 2,
+    }
+    if observe:
+        staleness["observed_best"] = observed
+    if measure_staleness:
+        sequential = dcop_gibbs_hogwild(instance, max_iters=updates, beta=beta, seed=seed, workers=1,
+                                        sync_every=cadence, poll=poll, observe=True)
+        staleness["sequential_observed_best"] = sequential["staleness"]["observed_best"]
+        staleness["sequential_conflicts"] = sequential["conflicts"]
+        staleness["sequential_iters_to_zero"] = sequential["iters_to_zero"]
+        staleness["conflict_gap"] = observed - staleness["sequential_observed_best"]
+        staleness["sequential_updates_per_sec"] = sequential["updates_per_sec"]
+
+    assignment = {node: colors[best_assignment[i]] for i, node in enumerate(nodes)}
+
+    return {
+        "assignment": assignment,
+        "conflicts": best_conflicts,
+        "iterations": updates,
+        "beta": beta,
+        "schedule": "hogwild",
+        "seed": seed,
+        "workers": workers,
+        "iters_to_zero": iters_to_zero,
+        "time_to_zero": time_to_zero,
+        "history_best": telemetry.finish().values(),
+        "updates_per_sec": updates / elapsed if elapsed > 0 else float("inf"),
+        "elapsed": elapsed,
+        "staleness": staleness,
+    }
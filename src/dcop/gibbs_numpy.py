@@ -0,0 +1,241 @@
+import time
+import numpy as np
+
+from src.dcop.max_sum_numpy import EdgeIndex
+from src.dcop.telemetry import telemetry_for
+
+
+def independent_sets(graph):
+    """Partition the nodes into independent sets with a largest-degree-first greedy coloring."""
+    starts, degree, dst = graph.starts, graph.degree, graph.dst
+    color = np.full(graph.n, -1, dtype=np.int64)
+    for u in np.argsort(-degree, kind="stable"):
+        used = set(color[dst[starts[u]:starts[u] + degree[u]]].tolist())
+        c = 0
+        while c in used:
+            c += 1
+        color[u] = c
+    return [np.flatnonzero(color == c) for c in range(int(color.max()) + 1)] if graph.n else []
+
+
+def expand_edges(graph, node_ids):
+    """Positions of all directed edges leaving the given nodes, in node order."""
+    deg = graph.degree[node_ids]
+    total = int(deg.sum())
+    first = np.repeat(graph.starts[node_ids] - np.cumsum(deg) + deg, deg)
+    return first + np.arange(total), deg
+
+
+def neighbor_color_counts(graph, assignment, k):
+    counts = np.zeros((graph.n, k), dtype=np.int64)
+    np.add.at(counts, (graph.src, assignment[graph.dst]), 1)
+    return counts
+
+
+def sample_rows(weights, uniforms):
+    """One categorical draw per row of unnormalised weights."""
+    cumulative = np.cumsum(weights, axis=1)
+    target = uniforms * cumulative[:, -1]
+    return np.minimum((cumulative < target[:, None]).sum(axis=1), weights.shape[1] - 1)
+
+
+def boltzmann_weights(costs, beta):
+    """exp(-beta * cost) per row, shifted by the row minimum so the weights cannot all underflow."""
+    return np.exp(-beta * (costs - costs.min(axis=1, keepdims=True)))
+
+
+def resample_set(graph, nodes, assignment, counts, beta, rng):
+    """Resample every node of an independent set at once; returns the conflict delta.
+
+    No two nodes in the set are adjacent, so their conditionals only read
+    neighbor colors outside the set and the joint update is a valid Gibbs step.
+    """
+    costs = counts[nodes]
+    new = sample_rows(boltzmann_weights(costs, beta), rng.random(len(nodes)))
+    old = assignment[nodes]
+    moved = new != old
+    if not moved.any():
+        return 0
+
+    nodes, new, old = nodes[moved], new[moved], old[moved]
+    delta = int(counts[nodes, new].sum() - counts[nodes, old].sum())
+
+    positions, deg = expand_edges(graph, nodes)
+    nbrs = graph.dst[positions]
+    np.subtract.at(counts, (nbrs, np.repeat(old, deg)), 1)
+    np.add.at(counts, (nbrs, np.repeat(new, deg)), 1)
+    assignment[nodes] = new
+    return delta
+
+
+def chain_color_counts(graph, assignments, k):
+    """counts[c, node, color] = neighbors of node with that color in chain c."""
+    chains = assignments.shape[0]
+    chain = np.arange(chains)[:, None]
+    flat = (chain * graph.n + graph.src[None, :]) * k + assignments[:, graph.dst]
+    return np.bincount(flat.ravel(), minlength=chains * graph.n * k).reshape(chains, graph.n, k)
+
+
+def gibbs_multichain(instance, seeds, max_iters=50, beta=2, schedule="random", block=256, telemetry=None):
+    """Run one DCOP-Gibbs chain per seed in lockstep; returns one result per seed.
+
+    Chain c draws from its own Generator seeded by seeds[c], refilled block
+    steps at a time, so a seed gives the same chain whatever else is in the batch.
+    telemetry, if given, holds one Telemetry per seed; the best-so-far values
+    are handed over once per block.
+    """
+    if schedule not in ("random", "round_robin"):
+        raise ValueError(f"Unknown multichain schedule: {schedule}")
+
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+    C = len(seeds)
+
+    graph = EdgeIndex(nodes, instance.edges)
+    n = graph.n
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    chain_ids = np.arange(C)
+
+    assignments = np.stack([rng.integers(k, size=n) for rng in rngs]) if C else np.zeros((0, n), dtype=np.int64)
+    counts = chain_color_counts(graph, assignments, k)
+    curr = np.count_nonzero(assignments[:, graph.edge_u] == assignments[:, graph.edge_v], axis=1)
+    best = curr.copy()
+    best_assignments = assignments.copy()
+
+    iterations = np.full(C, max_iters, dtype=np.int64)
+    iters_to_zero = [None] * C
+    active = np.ones(C, dtype=bool)
+
+    telemetry = [telemetry_for(None if telemetry is None else telemetry[c]) for c in range(C)]
+    for c in range(C):
+        telemetry[c].record(0, int(best[c]))
+    # Best-so-far values of the current block, flushed to telemetry when it ends
+    history = np.zeros((block, C), dtype=np.int64)
+
+    def flush(t_end):
+        first = (t_end - 1) // block * block
+        steps = np.arange(first + 1, t_end + 1)
+        for c in range(C):
+            end = min(t_end, int(iterations[c])) - first
+            if end > 0:
+                telemetry[c].extend(steps[:end], history[:end, c])
+
+    picks = np.zeros((C, block), dtype=np.int64)
+    uniforms = np.zeros((C, block))
+
+    start = time.perf_counter()
+    updates = 0
+    t = -1
+    for t in range(max_iters if n else 0):
+        if not active.any():
+            break
+        if t % block == 0:
+            if t:
+                flush(t)
+            for c, rng in enumerate(rngs):
+                if schedule == "random":
+                    picks[c] = rng.integers(n, size=block)
+                uniforms[c] = rng.random(block)
+
+        live = chain_ids[active]
+        node = picks[live, t % block] if schedule == "random" else np.full(len(live), t % n)
+        new = sample_rows(boltzmann_weights(counts[live, node], beta), uniforms[live, t % block])
+        old = assignments[live, node]
+        updates += len(live)
+
+        moved = new != old
+        if moved.any():
+            c, node, new, old = live[moved], node[moved], new[moved], old[moved]
+            curr[c] += counts[c, node, new] - counts[c, node, old]
+            positions, deg = expand_edges(graph, node)
+            chain = np.repeat(c, deg)
+            nbrs = graph.dst[positions]
+            np.subtract.at(counts, (chain, nbrs, np.repeat(old, deg)), 1)
+            np.add.at(counts, (chain, nbrs, np.repeat(new, deg)), 1)
+            assignments[c, node] = new
+
+            improved = c[curr[c] < best[c]]
+            best[improved] = curr[improved]
+            best_assignments[improved] = assignments[improved]
+
+        history[t % block, live] = best[live]
+        for c in live[best[live] == 0]:
+            iters_to_zero[c] = t + 1
+            iterations[c] = t + 1
+            active[c] = False
+    if t >= 0:
+        flush(min(t + 1, int(iterations.max())))
+    elapsed = time.perf_counter() - start
+    rate = updates / elapsed if elapsed > 0 else float("inf")
+
+    results = []
+    for c, seed in enumerate(seeds):
+        results.append({
+            "assignment": {node: colors[best_assignments[c, i]] for i, node in enumerate(nodes)},
+            "conflicts": int(best[c]),
+            "iterations": int(iterations[c]),
+            "beta": beta,
+            "schedule": schedule,
+            "seed": seed,
+            "iters_to_zero": iters_to_zero[c],
+            "history_best": telemetry[c].finish().values(),
+            "updates_per_sec": rate,
+        })
+    return results
+
+
+def gibbs_chromatic(instance, max_iters=50, beta=2, seed=10, telemetry=None):
+    """DCOP-Gibbs sweeping whole independent sets per step; max_iters counts node updates."""
+    rng = np.random.default_rng(seed)
+
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+
+    graph = EdgeIndex(nodes, instance.edges)
+    sets = independent_sets(graph)
+
+    assignment = rng.integers(k, size=graph.n)
+    counts = neighbor_color_counts(graph, assignment, k)
+    curr_conflicts = int(np.count_nonzero(assignment[graph.edge_u] == assignment[graph.edge_v]))
+    best_conflicts = curr_conflicts
+    best_assignment = assignment.copy()
+    telemetry = telemetry_for(telemetry)
+    telemetry.record(0, best_conflicts)
+    iters_to_zero = 0 if best_conflicts == 0 else None
+
+    updates = 0
+    start = time.perf_counter()
+    while sets and updates < max_iters and iters_to_zero is None:
+        for block in sets:
+            block = block[:max_iters - updates]
+            curr_conflicts += resample_set(graph, block, assignment, counts, beta, rng)
+            updates += len(block)
+
+            if curr_conflicts < best_conflicts:
+                best_conflicts = curr_conflicts
+                best_assignment = assignment.copy()
+            telemetry.record(updates, best_conflicts)
+
+            if best_conflicts == 0:
+                iters_to_zero = updates
+                break
+            if updates >= max_iters:
+                break
+    elapsed = time.perf_counter() - start
+
+    assignment = {n: colors[best_assignment[i]] for i, n in enumerate(nodes)}
+
+    return {
+        "assignment": assignment,
+        "conflicts": best_conflicts,
+        "iterations": updates,
+        "beta": beta,
+        "schedule": "chromatic",
+        "seed": seed,
+        "iters_to_zero": iters_to_zero,
+        "history_best": telemetry.finish().values(),
+        "independent_sets": len(sets),
+        "updates_per_sec": updates / elapsed if elapsed > 0 else float("inf"),
+    }
@@ -0,0 +1,240 @@
+import math
+import multiprocessing as mp
+import random
+import time
+import traceback
+
+from src.dcop.gibbs import BestJournal, BoltzmannSampler, compute_conflicts, neighbor_color_counts, recolor
+from src.dcop.max_sum import build_neighbors
+from src.dcop.telemetry import telemetry_for
+
+
+class Replica:
+    """One DCOP-Gibbs chain whose temperature is set by the caller for each run."""
+
+    def __init__(self, instance, seed):
+        self.rng = random.Random(seed)
+        self.nodes = instance.nodes
+        self.k = len(instance.colors)
+        self.neighbors = build_neighbors(self.nodes, instance.edges)
+
+        self.assignment_index = {n: self.rng.randrange(self.k) for n in self.nodes}
+        self.counts = neighbor_color_counts(self.nodes, self.neighbors, self.assignment_index, self.k)
+        self.sampler = BoltzmannSampler(self.rng, max((len(nb) for nb in self.neighbors.values()), default=0))
+        self.conflicts = compute_conflicts(instance.edges, self.assignment_index)
+        self.best_conflicts = self.conflicts
+        self.journal = BestJournal(self.assignment_index)
+
+    def run(self, beta, steps):
+        """Take up to steps random-scan updates at beta; stops early at zero conflicts."""
+        rng, counts, sample = self.rng, self.counts, self.sampler.sample
+        assignment_index, journal = self.assignment_index, self.journal
+        for step in range(steps):
+            node = rng.choice(self.nodes)
+            new_color = sample(counts[node], beta)
+            old_color = assignment_index[node]
+            if new_color != old_color:
+                self.conflicts += recolor(node, new_color, self.neighbors, assignment_index, counts)
+                journal.record(node, old_color)
+            if self.conflicts < self.best_conflicts:
+                self.best_conflicts = self.conflicts
+                journal.improved()
+                if self.best_conflicts == 0:
+                    return step + 1
+        return steps
+
+    def status(self):
+        return self.conflicts, self.best_conflicts
+
+    def best(self):
+        return self.best_conflicts, self.journal.rebuild()
+
+
+def replica_worker(conn, instance, seeds):
+    try:
+        replicas = [Replica(instance, seed) for seed in seeds]
+        conn.send([r.status() for r in replicas])
+        while True:
+            command, payload = conn.recv()
+            if command == "run":
+                steps, betas = payload
+                taken = [r.run(beta, steps) for r, beta in zip(replicas, betas)]
+                conn.send((taken, [r.status() for r in replicas]))
+            elif command == "best":
+                conn.send([r.best() for r in replicas])
+            else:
+                break
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class ReplicaPool:
+    """Replicas spread over worker processes, driven through pipes in lockstep."""
+
+    def __init__(self, instance, seeds, workers):
+        ctx = mp.get_context()
+        self.groups = [list(range(w, len(seeds), workers)) for w in range(workers)]
+        self.conns = []
+        self.procs = []
+        for group in self.groups:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=replica_worker, args=(child, instance, [seeds[r] for r in group]))
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.count = len(seeds)
+        self.status = self.gather([conn.recv() for conn in self.conns])
+
+    def gather(self, replies):
+        out = [None] * self.count
+        for group, reply in zip(self.groups, replies):
+            if isinstance(reply, tuple) and reply and reply[0] == "error":
+                self.close()
+                raise RuntimeError(f"Tempering replica worker failed:\n{reply[1]}")
+            for r, value in zip(group, reply):
+                out[r] = value
+        return out
+
+    def run(self, betas, steps):
+        for group, conn in zip(self.groups, self.conns):
+            conn.send(("run", (steps, [betas[r] for r in group])))
+        replies = [conn.recv() for conn in self.conns]
+        for reply in replies:
+            if reply[0] == "error":
+                self.gather([reply])
+        taken = self.gather([reply[0] for reply in replies])
+        self.status = self.gather([reply[1] for reply in replies])
+        return taken
+
+    def best(self):
+        for conn in self.conns:
+            conn.send(("best", None))
+        return self.gather([conn.recv() for conn in self.conns])
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc in self.procs:
+            proc.join()
+
+
+class LocalReplicas:
+    """Same interface as ReplicaPool with every replica in this process."""
+
+    def __init__(self, instance, seeds):
+        self.replicas = [Replica(instance, seed) for seed in seeds]
+        self.status = [r.status() for r in self.replicas]
+
+    def run(self, betas, steps):
+        taken = [r.run(beta, steps) for r, beta in zip(self.replicas, betas)]
+        self.status = [r.status() for r in self.replicas]
+        return taken
+
+    def best(self):
+        return [r.best() for r in self.replicas]
+
+    def close(self):
+        pass
+
+
+def temperature_ladder(replicas, beta_min, beta_max):
+    """Geometrically spaced betas from beta_min (hottest) to beta_max (coldest)."""
+    if replicas == 1:
+        return [beta_max]
+    return [beta_min * (beta_max / beta_min) ** (r / (replicas - 1)) for r in range(replicas)]
+
+
+def dcop_gibbs_tempering(instance, max_iters=50, betas=None, replicas=4, beta_min=0.5, beta_max=4.0,
+                         swap_every=50, seed=10, workers=None, telemetry=None):
+    """Parallel-tempering DCOP-Gibbs: replicas at a ladder of betas exchange states between runs.
+
+    Every swap_every steps, neighbouring rungs (alternating even and odd
+    pairs) swap their states with the Metropolis probability
+    min(1, exp((beta_a - beta_b) * (E_a - E_b))), E being the conflict count.
+    Swapping which replica sits on which rung moves only the betas, so the
+    replicas can stay in their worker processes. max_iters counts steps per
+    replica.
+    """
+    if betas is None:
+        betas = temperature_ladder(replicas, beta_min, beta_max)
+    R = len(betas)
+    if R == 0:
+        raise ValueError("Parallel tempering needs at least one replica")
+
+    swap_rng = random.Random(f"{seed}-swap")
+    seeds = [f"{seed}-{r}" for r in range(R)]
+    workers = max(1, min(workers or 1, R))
+
+    start = time.perf_counter()
+    chains = ReplicaPool(instance, seeds, workers) if workers > 1 else LocalReplicas(instance, seeds)
+    try:
+        # rung[r] = replica currently running at betas[r]
+        rung = list(range(R))
+        best_conflicts = min(best for _, best in chains.status)
+        telemetry = telemetry_for(telemetry)
+        telemetry.record(0, best_conflicts)
+        iters_to_zero = 0 if best_conflicts == 0 else None
+        time_to_zero = 0.0 if best_conflicts == 0 else None
+        attempted = accepted = 0
+        t = 0
+        phase = 0
+
+        while t < max_iters and best_conflicts > 0:
+            steps = min(swap_every, max_iters - t)
+            beta_of = [0.0] * R
+            for r, replica in enumerate(rung):
+                beta_of[replica] = betas[r]
+            taken = chains.run(beta_of, steps)
+
+            solved = [n for n, (_, best) in zip(taken, chains.status) if best == 0]
+            best_conflicts = min(best for _, best in chains.status)
+            if solved:
+                iters_to_zero = t + min(solved)
+                telemetry.record(iters_to_zero, best_conflicts)
+                time_to_zero = time.perf_counter() - start
+                t = iters_to_zero
+                break
+            t += steps
+            telemetry.record(t, best_conflicts)
+
+            for r in range(phase % 2, R - 1, 2):
+                a, b = rung[r], rung[r + 1]
+                energy_a, energy_b = chains.status[a][0], chains.status[b][0]
+                attempted += 1
+                log_accept = (betas[r] - betas[r + 1]) * (energy_a - energy_b)
+                if log_accept >= 0 or swap_rng.random() < math.exp(log_accept):
+                    rung[r], rung[r + 1] = b, a
+                    accepted += 1
+            phase += 1
+
+        bests = chains.best()
+    finally:
+        chains.close()
+    elapsed = time.perf_counter() - start
+
+    winner = min(range(R), key=lambda r: bests[r][0])
+    best_conflicts, best_assignment_index = bests[winner]
+    colors = instance.colors
+    assignment = {n: colors[best_assignment_index[n]] for n in instance.nodes}
+
+    return {
+        "assignment": assignment,
+        "conflicts": best_conflicts,
+        "iterations": t,
+        "betas": list(betas),
+        "schedule": "tempering",
+        "seed": seed,
+        "iters_to_zero": iters_to_zero,
+        "time_to_zero": time_to_zero,
+        "elapsed": elapsed,
+        "history_best": telemetry.finish().values(),
+        "swap_rate": accepted / attempted if attempted else None,
+        "workers": workers,
+    }
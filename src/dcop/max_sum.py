@@ -1,8 +1,8 @@
 import json
 import random
 random.seed(0)
-import matplotlib.pyplot as plt
-import networkx as nx
+
+from src.dcop.telemetry import telemetry_for
 
 class GraphColoringInstance:
     def __init__(self, name, nodes, edges, colors):
@@ -11,31 +11,6 @@ class GraphColoringInstance:
         self.edges = edges
         self.colors = colors
 
-def visualize_solution(instance, assignment, title):
-    G = nx.Graph()
-    G.add_nodes_from(instance.nodes)
-    G.add_edges_from(instance.edges)
-
-    unique_colors = sorted(set(assignment.values()))
-    palette = ['#ff6666', '#66ff66', '#6666ff', '#ffff66', '#ff66ff', '#66ffff']
-    color_map = {c: palette[i % len(palette)] for i, c in enumerate(unique_colors)}
-    node_colors = [color_map[assignment[n]] for n in G.nodes()]
-
-    plt.figure(figsize=(10, 8))
-
-    if "grid" in instance.name.lower():
-        pos = nx.spectral_layout(G)
-    else:
-        pos = nx.spring_layout(G, seed=42)
-
-    nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=500, edgecolors='black')
-    nx.draw_networkx_edges(G, pos, alpha=0.5)
-    nx.draw_networkx_labels(G, pos, font_size=10, font_weight='bold')
-
-    plt.title(title)
-    plt.axis('off')
-    plt.show()
-
 def load_instance(file_path):
     with open(file_path, 'r') as f:
         data = json.load(f)
@@ -58,6 +33,37 @@ def build_neighbors(nodes, edges):
 def conflict_cost(c1, c2):
     return 1 if c1 == c2 else 0
 
+def cost_table(k, cost_fn=conflict_cost):
+    return [[cost_fn(a, b) for b in range(k)] for a in range(k)]
+
+def coloring_penalty(table):
+    """Return w if the table is the not-equal constraint (w on the diagonal, 0 elsewhere), else None."""
+    k = len(table)
+    if k == 0:
+        return None
+    w = table[0][0]
+    if w < 0:
+        return None
+    for a in range(k):
+        for b in range(k):
+            if table[a][b] != (w if a == b else 0):
+                return None
+    return w
+
+def coloring_factor_message(msg, penalty=1):
+    # min over c' of cost(c', c) + msg[c'] only needs the two smallest entries:
+    # out[c] = min(msg[c] + w, best of the other colors)
+    best = second = float("inf")
+    best_c = -1
+    for c, x in enumerate(msg):
+        if x < best:
+            second = best
+            best = x
+            best_c = c
+        elif x < second:
+            second = x
+    return normalize([min(x + penalty, second if c == best_c else best) for c, x in enumerate(msg)])
+
 def normalize(vec):
     m = min(vec)
     return[x - m for x in vec]
@@ -65,30 +71,144 @@ def normalize(vec):
 def damp(old, new, alpha):
     return [(1 - alpha) * o + alpha * n for o, n in zip(old, new)]
 
-def max_sum(instance, max_iters=50, damping=0.5, tol=1e-6):
+def argmin(vec):
+    return min(range(len(vec)), key=vec.__getitem__)
+
+class ConflictTracker:
+    """Argmin assignment and conflict count, updated only around nodes whose belief changed."""
+
+    def __init__(self, nodes, neighbors, edges, beliefs):
+        self.neighbors = neighbors
+        self.assignment = {i: argmin(beliefs[i]) for i in nodes}
+        self.conflicts = 0
+        for u, v in edges:
+            if self.assignment[u] == self.assignment[v]:
+                self.conflicts += 1
+
+    def update(self, changed_nodes, beliefs):
+        for i in changed_nodes:
+            old = self.assignment[i]
+            new = argmin(beliefs[i])
+            if new == old:
+                continue
+            for nb in self.neighbors[i]:
+                c = self.assignment[nb]
+                if c == old:
+                    self.conflicts -= 1
+                elif c == new:
+                    self.conflicts += 1
+            self.assignment[i] = new
+
+def factor_to_var(msg, table, penalty=None):
+    """Message from the factor of edge (src, dst) to dst, given src's message."""
+    if penalty is not None:
+        return coloring_factor_message(msg, penalty)
+    k = len(msg)
+    out = [0.0] * k
+    for c_dst in range(k):
+        best = float("inf")
+        for c_src in range(k):
+            val = table[c_src][c_dst] + msg[c_src]
+            if val < best:
+                best = val
+        out[c_dst] = best
+    return normalize(out)
+
+def message_stream(seed=None):
+    """Where initial messages are drawn from: the shared module stream, or a private one for seed."""
+    return random if seed is None else random.Random(seed)
+
+def initial_messages(nodes, neighbors, k, rng=random):
+    messages = {}
+    for i in nodes:
+        for j in neighbors[i]:
+            messages[(i, j)] = normalize([rng.random() * 1e-3 for _ in range(k)])
+    return messages
+
+def max_sum(instance, max_iters=50, damping=0.5, tol=1e-6, engine="python", cost_fn=conflict_cost,
+            schedule="sync", threshold=None, sink=None, seed=None, **engine_options):
+
+    if schedule == "residual":
+        if engine != "python":
+            raise ValueError("The residual schedule is only available with the python engine")
+        from src.dcop.max_sum_residual import max_sum_residual
+        result = max_sum_residual(instance, max_iters=max_iters, damping=damping, tol=tol,
+                                  cost_fn=cost_fn, threshold=threshold, seed=seed, **engine_options)
+    elif schedule == "advp":
+        if engine != "python":
+            raise ValueError("The ADVP schedule is only available with the python engine")
+        from src.dcop.max_sum_advp import max_sum_advp
+        result = max_sum_advp(instance, max_iters=max_iters, damping=damping, tol=tol, cost_fn=cost_fn,
+                              seed=seed, **engine_options)
+    elif schedule != "sync":
+        raise ValueError(f"Unknown Max-Sum schedule: {schedule}")
+    elif engine == "numpy":
+        from src.dcop.max_sum_numpy import max_sum_numpy
+        result = max_sum_numpy(instance, max_iters=max_iters, damping=damping, tol=tol, cost_fn=cost_fn,
+                               seed=seed, **engine_options)
+    elif engine == "sharded":
+        from src.dcop.max_sum_sharded import max_sum_sharded
+        result = max_sum_sharded(instance, max_iters=max_iters, damping=damping, tol=tol, cost_fn=cost_fn,
+                                 seed=seed, **engine_options)
+    elif engine == "python":
+        result = max_sum_sync(instance, max_iters=max_iters, damping=damping, tol=tol, cost_fn=cost_fn,
+                              seed=seed, **engine_options)
+    else:
+        raise ValueError(f"Unknown Max-Sum engine: {engine}")
+
+    # Rendering is opt-in (see src/dcop/render.py) so batch callers stay headless
+    if sink is not None:
+        sink(instance, result)
+
+    return result
+
+def settled_iteration(history, steps=None):
+    """First iteration after which the conflict history no longer changes.
+
+    steps gives the iteration of each history point when it was downsampled.
+    """
+    t = len(history)
+    while t > 1 and history[t - 2] == history[-1]:
+        t -= 1
+    return t if steps is None else steps[t - 1]
+
+def max_sum_batch(instances, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost, **engine_options):
+    """Run Max-Sum on many instances in one vectorized loop; returns one result per instance."""
+    from src.dcop.max_sum_numpy import max_sum_numpy_batch
+    return max_sum_numpy_batch(instances, max_iters=max_iters, damping=damping, tol=tol, cost_fn=cost_fn,
+                               **engine_options)
+
+def max_sum_sync(instance, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost, seed=None,
+                 telemetry=None):
 
     nodes = instance.nodes
     colors = instance.colors
     k = len(colors)
-    history_conflicts = []
+    telemetry = telemetry_for(telemetry)
 
     neighbors = build_neighbors(nodes, instance.edges)
+    table = cost_table(k, cost_fn)
+    penalty = coloring_penalty(table)
 
-    messages = {}
-    for i in nodes:
-        for j in neighbors[i]:
-            messages[(i, j)] = normalize([random.random() * 1e-3 for _ in range(k)])
+    messages = initial_messages(nodes, neighbors, k, message_stream(seed))
 
     def factor_message(src, dst):
-        out = [0.0] * k
-        for c_dst in range(k):
-            best = float("inf")
-            for c_src in range(k):
-                val = conflict_cost(c_src, c_dst) + messages[(src, dst)][c_src]
-                if val < best:
-                    best = val
-            out[c_dst] = best
-        return normalize(out)
+        return factor_to_var(messages[(src, dst)], table, penalty)
+
+    def compute_factors():
+        # Every factor message is computed once per iteration and shared by
+        # the outgoing messages, the beliefs and the decoded assignment.
+        return {(src, dst): factor_message(src, dst) for (src, dst) in messages}
+
+    def node_belief(i):
+        belief = [0.0] * k
+        for neighbor in neighbors[i]:
+            belief = [a + b for a, b in zip(belief, factors[(neighbor, i)])]
+        return belief
+
+    factors = compute_factors()
+    beliefs = {i: node_belief(i) for i in nodes}
+    tracker = ConflictTracker(nodes, neighbors, instance.edges, beliefs)
 
     for iteration in range(max_iters):
 
@@ -98,16 +218,9 @@ def max_sum(instance, max_iters=50, damping=0.5, tol=1e-6):
         for i in nodes:
             for j in neighbors[i]:
 
-                incoming = [0.0] * k
-
-                for neighbor in neighbors[i]:
-                    if neighbor == j:
-                        continue
-
-                    factor_to_i = factor_message(neighbor, i)
-                    incoming = [a + b for a, b in zip(incoming, factor_to_i)]
-
-                candidate = normalize(incoming)
+                # Total belief minus j's own contribution: O(k) per edge instead of O(deg * k)
+                own = factors[(j, i)]
+                candidate = normalize([b - f for b, f in zip(beliefs[i], own)])
 
                 old = messages[(i, j)]
                 updated = damp(old, candidate, damping)
@@ -120,56 +233,28 @@ def max_sum(instance, max_iters=50, damping=0.5, tol=1e-6):
                     max_delta = delta
 
         messages = new_messages
+        new_factors = compute_factors()
+        changed = {j for (i, j), f in new_factors.items() if f != factors[(i, j)]}
+        factors = new_factors
 
-        # Compute temporary assignment to track convergence
-        temp_assignment = {}
-        for i in nodes:
-            belief = [0.0] * k
-            for neighbor in neighbors[i]:
-                factor_to_i = factor_message(neighbor, i)
-                belief = [a + b for a, b in zip(belief, factor_to_i)]
-                best_color = min(range(k), key=lambda c: belief[c])
-                temp_assignment[i] = best_color
-
-        temp_conflicts = 0
-        for u, v in instance.edges:
-            if temp_assignment[u] == temp_assignment[v]:
-                temp_conflicts += 1
-
-        history_conflicts.append(temp_conflicts)
-
+        # Only nodes with a changed incoming factor message need a new belief,
+        # and only their edges can change the conflict count.
+        for i in changed:
+            beliefs[i] = node_belief(i)
+        tracker.update(changed, beliefs)
+        telemetry.record(iteration + 1, tracker.conflicts)
 
         if max_delta < tol:
             break
 
     # Decode assignment
-    assignment_index = {}
-    for i in nodes:
-        belief = [0.0] * k
-        for neighbor in neighbors[i]:
-            factor_to_i = factor_message(neighbor, i)
-            belief = [a + b for a, b in zip(belief, factor_to_i)]
-
-        best_color = min(range(k), key=lambda c: belief[c])
-        assignment_index[i] = best_color
-
+    assignment_index = tracker.assignment
     assignment = {i: colors[assignment_index[i]] for i in nodes}
-
-    conflicts = 0
-    for u, v in instance.edges:
-        if assignment_index[u] == assignment_index[v]:
-            conflicts += 1
-
-    visualize_solution(
-    instance,
-    assignment,
-    f"Max-Sum | {instance.name} | conflicts={conflicts}"
-    )
-
+    conflicts = tracker.conflicts
 
     return {
         "assignment": assignment,
         "conflicts": conflicts,
         "iterations": iteration + 1,
-        "history_conflicts": history_conflicts
+        "history_conflicts": telemetry.finish().values()
     }
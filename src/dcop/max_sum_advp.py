@@ -0,0 +1,108 @@
+from src.dcop.max_sum import (
+    ConflictTracker, build_neighbors, coloring_penalty, conflict_cost, cost_table, damp,
+    factor_to_var, initial_messages, message_stream, normalize
+)
+from src.dcop.telemetry import telemetry_for
+
+
+def longest_path(nodes, neighbors, position):
+    """Edges on the longest path of the DAG obtained by orienting edges along position."""
+    depth = {}
+    for i in sorted(nodes, key=position.__getitem__):
+        earlier = [depth[h] for h in neighbors[i] if position[h] < position[i]]
+        depth[i] = max(earlier) + 1 if earlier else 0
+    return max(depth.values(), default=0)
+
+
+def max_sum_advp(instance, max_iters=50, damping=1.0, tol=1e-6, cost_fn=conflict_cost,
+                 order=None, phase_iters=None, vp_after=2, seed=None, telemetry=None):
+    """Max-Sum_ADVP: alternating message directions over a node ordering plus value propagation.
+
+    Messages only travel from earlier to later nodes (or back) within a phase,
+    so each phase runs on a DAG and settles after at most its longest path.
+    The direction flips every phase_iters iterations; from phase vp_after on,
+    a factor's message is built from the sender's current value instead of
+    its whole message (value propagation).
+    """
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+    telemetry = telemetry_for(telemetry)
+
+    neighbors = build_neighbors(nodes, instance.edges)
+    table = cost_table(k, cost_fn)
+    penalty = coloring_penalty(table)
+
+    position = {node: pos for pos, node in enumerate(order if order is not None else nodes)}
+    if phase_iters is None:
+        phase_iters = max(1, longest_path(nodes, neighbors, position))
+
+    forward = [(i, j) for i in nodes for j in neighbors[i] if position[i] < position[j]]
+    backward = [(i, j) for i in nodes for j in neighbors[i] if position[i] > position[j]]
+
+    messages = initial_messages(nodes, neighbors, k, message_stream(seed))
+    factors = {edge: factor_to_var(m, table, penalty) for edge, m in messages.items()}
+
+    def node_belief(i):
+        belief = [0.0] * k
+        for neighbor in neighbors[i]:
+            belief = [a + b for a, b in zip(belief, factors[(neighbor, i)])]
+        return belief
+
+    beliefs = {i: node_belief(i) for i in nodes}
+    tracker = ConflictTracker(nodes, neighbors, instance.edges, beliefs)
+
+    # Convergence is only judged on whole forward + backward cycles
+    cycle_delta = 0
+    converged_at = None
+    iteration = -1
+    for iteration in range(max_iters):
+        phase = iteration // phase_iters
+        edges = forward if phase % 2 == 0 else backward
+        value_propagation = phase >= vp_after
+
+        new_messages = {}
+        max_delta = 0
+        for i, j in edges:
+            candidate = normalize([b - f for b, f in zip(beliefs[i], factors[(j, i)])])
+            old = messages[(i, j)]
+            updated = normalize(damp(old, candidate, damping))
+            new_messages[(i, j)] = updated
+            delta = max(abs(a - b) for a, b in zip(old, updated))
+            if delta > max_delta:
+                max_delta = delta
+
+        changed = set()
+        for (i, j), updated in new_messages.items():
+            messages[(i, j)] = updated
+            if value_propagation:
+                value = tracker.assignment[i]
+                new_factor = normalize([table[value][c] for c in range(k)])
+            else:
+                new_factor = factor_to_var(updated, table, penalty)
+            if new_factor != factors[(i, j)]:
+                factors[(i, j)] = new_factor
+                changed.add(j)
+
+        for i in changed:
+            beliefs[i] = node_belief(i)
+        tracker.update(changed, beliefs)
+        telemetry.record(iteration + 1, tracker.conflicts)
+
+        cycle_delta = max(cycle_delta, max_delta)
+        if (iteration + 1) % (2 * phase_iters) == 0:
+            if cycle_delta < tol:
+                converged_at = iteration + 1
+                break
+            cycle_delta = 0
+
+    assignment = {i: colors[tracker.assignment[i]] for i in nodes}
+
+    return {
+        "assignment": assignment,
+        "conflicts": tracker.conflicts,
+        "iterations": iteration + 1,
+        "converged_at": converged_at,
+        "phase_iters": phase_iters,
+        "history_conflicts": telemetry.finish().values()
+    }
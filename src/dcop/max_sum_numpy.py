@@ -0,0 +1,441 @@
+import random
+import tracemalloc
+import numpy as np
+
+from src.dcop.max_sum import coloring_penalty, conflict_cost, message_stream
+from src.dcop.telemetry import telemetry_for
+
+# Rows of the (E, k, k) broadcast in the generic factor step are processed in
+# chunks so large instances do not materialise the whole cube at once.
+FACTOR_CHUNK = 4096
+
+# Below this many colors a column-by-column minimum beats NumPy's axis=1
+# reduction, which has a high per-row cost on short rows.
+COLUMN_REDUCE_MAX_K = 8
+
+
+class EdgeIndex:
+    """Directed-edge layout of a coloring instance as integer arrays."""
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.n = len(nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        incident = {node: [] for node in nodes}
+        for e, (u, v) in enumerate(edges):
+            incident[u].append((v, e))
+            incident[v].append((u, e))
+
+        # Same (i, j) order as the dict-based engine, so edges are grouped by src;
+        # und[e] is the position of the undirected edge in instance.edges
+        src, dst, und = [], [], []
+        for i in nodes:
+            for j, e in incident[i]:
+                src.append(index[i])
+                dst.append(index[j])
+                und.append(e)
+        self.src = np.array(src, dtype=np.int64)
+        self.dst = np.array(dst, dtype=np.int64)
+        self.und = np.array(und, dtype=np.int64)
+        self.num_directed = len(src)
+
+        # rev[e] is the directed edge (dst[e], src[e])
+        keys = self.src * self.n + self.dst
+        order = np.argsort(keys, kind="stable")
+        rev_keys = self.dst * self.n + self.src
+        self.rev = order[np.searchsorted(keys[order], rev_keys)]
+
+        # Segment boundaries of each node's outgoing edges
+        self.degree = np.bincount(self.src, minlength=self.n)
+        self.starts = np.concatenate(([0], np.cumsum(self.degree)[:-1]))
+        self.has_edges = self.degree > 0
+
+        self.edge_u = np.array([index[u] for u, _ in edges], dtype=np.int64)
+        self.edge_v = np.array([index[v] for _, v in edges], dtype=np.int64)
+
+    def restrict(self, keep):
+        """Sub-index over a node mask that is a union of connected components.
+
+        Equivalent to building a new EdgeIndex over the kept nodes and edges in
+        their original order, without going back through Python loops.
+        """
+        keep_edges = keep[self.src]
+        keep_und = keep[self.edge_u]
+        node_map = np.cumsum(keep) - 1
+        edge_map = np.cumsum(keep_edges) - 1
+        und_map = np.cumsum(keep_und) - 1
+
+        sub = object.__new__(EdgeIndex)
+        sub.nodes = [node for node, k in zip(self.nodes, keep) if k]
+        sub.n = len(sub.nodes)
+        sub.src = node_map[self.src[keep_edges]]
+        sub.dst = node_map[self.dst[keep_edges]]
+        sub.und = und_map[self.und[keep_edges]]
+        sub.rev = edge_map[self.rev[keep_edges]]
+        sub.num_directed = len(sub.src)
+        sub.degree = self.degree[keep]
+        sub.starts = np.concatenate(([0], np.cumsum(sub.degree)[:-1]))
+        sub.has_edges = sub.degree > 0
+        sub.edge_u = node_map[self.edge_u[keep_und]]
+        sub.edge_v = node_map[self.edge_v[keep_und]]
+        return sub
+
+    def incident_edges(self, node_ids):
+        """Undirected edge ids touching any of the given nodes (without duplicates)."""
+        deg = self.degree[node_ids]
+        total = int(deg.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenate the ranges starts[i] : starts[i] + deg[i] without a Python loop
+        first = np.repeat(self.starts[node_ids] - np.cumsum(deg) + deg, deg)
+        return np.unique(self.und[first + np.arange(total)])
+
+
+def cost_matrix(colors, cost_fn=conflict_cost, dtype=float):
+    k = len(colors)
+    return np.array([[cost_fn(a, b) for b in range(k)] for a in range(k)], dtype=dtype)
+
+
+def normalize_rows(arr):
+    return arr - arr.min(axis=1, keepdims=True)
+
+
+def row_reduce_into(ufunc, arr, out):
+    """ufunc.reduce(arr, axis=1) into an (E, 1) buffer."""
+    k = arr.shape[1]
+    if k == 1 or k > COLUMN_REDUCE_MAX_K:
+        ufunc.reduce(arr, axis=1, keepdims=True, out=out)
+        return
+    col = out[:, 0]
+    ufunc(arr[:, 0], arr[:, 1], out=col)
+    for c in range(2, k):
+        ufunc(col, arr[:, c], out=col)
+
+
+def normalize_rows_inplace(arr, row_min):
+    row_reduce_into(np.minimum, arr, row_min)
+    np.subtract(arr, row_min, out=arr)
+
+
+class Workspace:
+    """Preallocated buffers reused by every iteration of the NumPy engine.
+
+    messages/next are the current and next variable-to-factor messages and are
+    swapped after each sweep; nothing of size O(E * k) is allocated in the loop.
+    """
+
+    def __init__(self, graph, k, dtype=np.float64):
+        E = graph.num_directed
+        self.dtype = np.dtype(dtype)
+        self.messages = np.zeros((E, k), dtype=self.dtype)
+        self.next = np.zeros((E, k), dtype=self.dtype)
+        self.factors = np.zeros((E, k), dtype=self.dtype)
+        self.gathered = np.zeros((E, k), dtype=self.dtype)
+        self.beliefs = np.zeros((graph.n, k), dtype=self.dtype)
+        self.belief_rows = np.zeros((int(graph.has_edges.sum()), k), dtype=self.dtype)
+        self.row_min = np.zeros((E, 1), dtype=self.dtype)
+        self.row_second = np.zeros((E, 1), dtype=self.dtype)
+        self.column = np.zeros(E, dtype=self.dtype)
+        self.best_c = np.zeros(E, dtype=np.intp)
+        self.rows = np.arange(E, dtype=np.intp)
+        self.assignment = np.zeros(graph.n, dtype=np.intp)
+        self.assignment_prev = np.zeros(graph.n, dtype=np.intp)
+
+    def swap(self):
+        self.messages, self.next = self.next, self.messages
+
+    def nbytes(self):
+        return sum(a.nbytes for a in vars(self).values() if isinstance(a, np.ndarray))
+
+
+def factor_messages_into(ws, table, penalty=None):
+    """Factor-to-variable messages for every directed edge (src -> dst): ws.messages -> ws.factors."""
+    messages, out = ws.messages, ws.factors
+    if messages.shape[0] == 0:
+        return
+    if penalty is None:
+        for lo in range(0, messages.shape[0], FACTOR_CHUNK):
+            hi = lo + FACTOR_CHUNK
+            np.min(messages[lo:hi, :, None] + table[None, :, :], axis=1, out=out[lo:hi])
+        normalize_rows_inplace(out, ws.row_min)
+        return
+    if messages.shape[1] == 1:
+        out.fill(0)
+        return
+
+    best, second, best_c, rows = ws.row_min, ws.row_second, ws.best_c, ws.rows
+    row_reduce_into(np.minimum, messages, best)
+    np.argmin(messages, axis=1, out=best_c)
+    # Second minimum: mask the best entry for a moment and take the min again
+    messages[rows, best_c] = np.inf
+    row_reduce_into(np.minimum, messages, second)
+    messages[rows, best_c] = best[:, 0]
+
+    # Off the argmin every color can fall back to the best entry; the argmin
+    # column itself can only fall back to the second best.
+    np.add(messages, penalty, out=out)
+    np.minimum(out, best, out=out)
+    np.add(best[:, 0], penalty, out=ws.column)
+    np.minimum(ws.column, second[:, 0], out=ws.column)
+    out[rows, best_c] = ws.column
+    normalize_rows_inplace(out, ws.row_min)
+
+
+def decode_into(graph, ws):
+    """ws.factors -> ws.gathered (factors[rev]), ws.beliefs and ws.assignment."""
+    if graph.num_directed:
+        np.take(ws.factors, graph.rev, axis=0, out=ws.gathered, mode="clip")
+        if ws.belief_rows.shape[0] == graph.n:
+            np.add.reduceat(ws.gathered, graph.starts, axis=0, out=ws.beliefs)
+        else:
+            np.add.reduceat(ws.gathered, graph.starts[graph.has_edges], axis=0, out=ws.belief_rows)
+            ws.beliefs[graph.has_edges] = ws.belief_rows
+    # The tracker still holds the previous assignment, so write into the other buffer
+    ws.assignment, ws.assignment_prev = ws.assignment_prev, ws.assignment
+    np.argmin(ws.beliefs, axis=1, out=ws.assignment)
+
+
+def update_messages_into(graph, ws, damping):
+    """One synchronous sweep: ws.messages -> ws.next, leaving |messages - next| in ws.gathered."""
+    # Outgoing message i -> j: everything i heard except j's own factor message
+    # (ws.gathered holds factors[rev] from the last decode)
+    np.take(ws.beliefs, graph.src, axis=0, out=ws.next, mode="clip")
+    np.subtract(ws.next, ws.gathered, out=ws.next)
+    normalize_rows_inplace(ws.next, ws.row_min)
+
+    # Damp against the current messages, reusing ws.gathered as scratch
+    np.multiply(ws.messages, 1 - damping, out=ws.gathered)
+    np.multiply(ws.next, damping, out=ws.next)
+    np.add(ws.gathered, ws.next, out=ws.next)
+    normalize_rows_inplace(ws.next, ws.row_min)
+
+    np.subtract(ws.messages, ws.next, out=ws.gathered)
+    np.abs(ws.gathered, out=ws.gathered)
+
+
+def random_messages(count, k, rng=random):
+    # Drawn from the same stream and in the same order as the dict-based
+    # engine so both engines start from identical messages.
+    init = np.array(
+        [[rng.random() * 1e-3 for _ in range(k)] for _ in range(count)],
+        dtype=float,
+    ).reshape(count, k)
+    return normalize_rows(init)
+
+
+def initial_messages(graph, k, rng=random):
+    return random_messages(graph.num_directed, k, rng)
+
+
+def count_conflicts(graph, assignment_index):
+    return int(np.count_nonzero(assignment_index[graph.edge_u] == assignment_index[graph.edge_v]))
+
+
+class ConflictTracker:
+    """Running conflict count, adjusted only on edges around nodes whose argmin changed."""
+
+    def __init__(self, graph, assignment_index):
+        self.graph = graph
+        self.assignment = assignment_index
+        self.conflicts = count_conflicts(graph, assignment_index)
+
+    def update(self, assignment_index):
+        changed = np.flatnonzero(assignment_index != self.assignment)
+        if changed.size:
+            ids = self.graph.incident_edges(changed)
+            u = self.graph.edge_u[ids]
+            v = self.graph.edge_v[ids]
+            before = np.count_nonzero(self.assignment[u] == self.assignment[v])
+            after = np.count_nonzero(assignment_index[u] == assignment_index[v])
+            self.conflicts += int(after) - int(before)
+        self.assignment = assignment_index
+
+
+def max_sum_numpy(instance, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost,
+                  dtype="float64", profile_memory=False, seed=None, telemetry=None):
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+    telemetry = telemetry_for(telemetry)
+
+    if profile_memory:
+        tracemalloc.start()
+
+    graph = EdgeIndex(nodes, instance.edges)
+    ws = Workspace(graph, k, dtype)
+    table = cost_matrix(colors, cost_fn, ws.dtype)
+    penalty = coloring_penalty(table)
+
+    ws.messages[...] = initial_messages(graph, k, message_stream(seed))
+    factor_messages_into(ws, table, penalty)
+    decode_into(graph, ws)
+    tracker = ConflictTracker(graph, ws.assignment)
+
+    iteration_bytes = []
+    iteration = -1
+    for iteration in range(max_iters):
+        if profile_memory:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+        update_messages_into(graph, ws, damping)
+        max_delta = float(ws.gathered.max()) if graph.num_directed else 0.0
+        ws.swap()
+
+        # The factor messages of the new state are reused by the next iteration
+        factor_messages_into(ws, table, penalty)
+        decode_into(graph, ws)
+        tracker.update(ws.assignment)
+        telemetry.record(iteration + 1, tracker.conflicts)
+
+        if profile_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            iteration_bytes.append(peak - base)
+
+        if max_delta < tol:
+            break
+
+    memory = {"dtype": ws.dtype.name, "buffer_bytes": ws.nbytes()}
+    if profile_memory:
+        _, memory["peak_bytes"] = tracemalloc.get_traced_memory()
+        memory["alloc_bytes_per_iter"] = max(iteration_bytes) if iteration_bytes else 0
+        tracemalloc.stop()
+
+    assignment = {node: colors[ws.assignment[i]] for i, node in enumerate(nodes)}
+    conflicts = tracker.conflicts
+
+    return {
+        "assignment": assignment,
+        "conflicts": conflicts,
+        "iterations": iteration + 1,
+        "history_conflicts": telemetry.finish().values(),
+        "memory": memory
+    }
+
+
+class PackedBatch:
+    """Several instances with the same number of colors as one block-diagonal graph."""
+
+    def __init__(self, instances, members, dtype, graph=None):
+        self.members = members
+        if graph is None:
+            nodes = [(b, node) for b in members for node in instances[b].nodes]
+            edges = [((b, u), (b, v)) for b in members for u, v in instances[b].edges]
+            graph = EdgeIndex(nodes, edges)
+        self.graph = graph
+        self.ws = Workspace(self.graph, len(instances[members[0]].colors), dtype)
+
+        m = len(members)
+        node_counts = np.array([len(instances[b].nodes) for b in members], dtype=np.int64)
+        edge_counts = np.array([len(instances[b].edges) for b in members], dtype=np.int64)
+        self.node_offsets = np.concatenate(([0], np.cumsum(node_counts)))
+        # Directed edges are grouped by source node, so each member owns one contiguous range
+        self.edge_offsets = np.concatenate(([0], np.cumsum(2 * edge_counts)))
+        self.und_member = np.repeat(np.arange(m), edge_counts)
+
+    def rows(self, pos):
+        return slice(self.edge_offsets[pos], self.edge_offsets[pos + 1])
+
+    def member_max(self, values):
+        """Maximum of a per-directed-edge array within each member (0 for edgeless members)."""
+        out = np.zeros(len(self.members), dtype=values.dtype)
+        nonempty = self.edge_offsets[1:] > self.edge_offsets[:-1]
+        if nonempty.any():
+            out[nonempty] = np.maximum.reduceat(values, self.edge_offsets[:-1][nonempty])
+        return out
+
+    def member_conflicts(self):
+        assignment = self.ws.assignment
+        same = assignment[self.graph.edge_u] == assignment[self.graph.edge_v]
+        return np.bincount(self.und_member[same], minlength=len(self.members))
+
+
+def max_sum_numpy_batch(instances, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost,
+                        dtype="float64", seed=None, telemetry=None):
+    """Solve many instances at once; each one stops as soon as it converges.
+
+    telemetry, if given, holds one Telemetry per instance.
+    """
+    results = [None] * len(instances)
+    telemetry = [telemetry_for(None if telemetry is None else telemetry[b]) for b in range(len(instances))]
+
+    # Initial messages are drawn per instance in input order, exactly as a
+    # sequence of max_sum() calls would draw them.
+    rng = message_stream(seed)
+    init = [random_messages(2 * len(inst.edges), len(inst.colors), rng) for inst in instances]
+
+    groups = {}
+    for b, inst in enumerate(instances):
+        groups.setdefault(len(inst.colors), []).append(b)
+
+    for members in groups.values():
+        batch = PackedBatch(instances, members, dtype)
+        for pos, b in enumerate(members):
+            batch.ws.messages[batch.rows(pos)] = init[b]
+        table = cost_matrix(instances[members[0]].colors, cost_fn, batch.ws.dtype)
+        penalty = coloring_penalty(table)
+
+        factor_messages_into(batch.ws, table, penalty)
+        decode_into(batch.graph, batch.ws)
+        active = list(range(len(members)))
+
+        for iteration in range(max_iters):
+            graph, ws = batch.graph, batch.ws
+            update_messages_into(graph, ws, damping)
+            row_reduce_into(np.maximum, ws.gathered, ws.row_min)
+            deltas = batch.member_max(ws.row_min[:, 0])
+            ws.swap()
+            factor_messages_into(ws, table, penalty)
+            decode_into(graph, ws)
+            conflicts = batch.member_conflicts()
+
+            still_active = []
+            for pos in active:
+                b = batch.members[pos]
+                telemetry[b].record(iteration + 1, int(conflicts[pos]))
+                if deltas[pos] < tol or iteration == max_iters - 1:
+                    results[b] = batch_result(instances[b], batch, pos, iteration + 1, int(conflicts[pos]),
+                                              telemetry[b])
+                else:
+                    still_active.append(pos)
+            active = still_active
+            if not active:
+                break
+
+            # Converged members keep being swept until at least half are done,
+            # then the survivors are repacked into a smaller block structure.
+            if len(active) <= len(batch.members) // 2:
+                batch, active = repack(instances, batch, active, dtype, table, penalty)
+
+        # Only reached with max_iters <= 0: report the decoded initial messages
+        if active:
+            conflicts = batch.member_conflicts()
+            for pos in active:
+                b = batch.members[pos]
+                results[b] = batch_result(instances[b], batch, pos, 0, int(conflicts[pos]), telemetry[b])
+
+    return results
+
+
+def batch_result(instance, batch, pos, iterations, conflicts, telemetry):
+    lo, hi = batch.node_offsets[pos], batch.node_offsets[pos + 1]
+    assignment_index = batch.ws.assignment[lo:hi]
+    return {
+        "assignment": {node: instance.colors[c] for node, c in zip(instance.nodes, assignment_index)},
+        "conflicts": conflicts,
+        "iterations": iterations,
+        "history_conflicts": telemetry.finish().values()
+    }
+
+
+def repack(instances, batch, active, dtype, table, penalty):
+    members = [batch.members[pos] for pos in active]
+    keep = np.zeros(batch.graph.n, dtype=bool)
+    for pos in active:
+        keep[batch.node_offsets[pos]:batch.node_offsets[pos + 1]] = True
+    packed = PackedBatch(instances, members, dtype, batch.graph.restrict(keep))
+    for new_pos, pos in enumerate(active):
+        packed.ws.messages[packed.rows(new_pos)] = batch.ws.messages[batch.rows(pos)]
+    factor_messages_into(packed.ws, table, penalty)
+    decode_into(packed.graph, packed.ws)
+    return packed, list(range(len(members)))
@@ -0,0 +1,106 @@
+import heapq
+import itertools
+import math
+
+from src.dcop.max_sum import (
+    ConflictTracker, build_neighbors, coloring_penalty, conflict_cost, cost_table, damp,
+    factor_to_var, initial_messages, message_stream, normalize
+)
+from src.dcop.telemetry import telemetry_for
+
+
+def max_sum_residual(instance, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost, threshold=None,
+                     seed=None, telemetry=None):
+    """Asynchronous Max-Sum that always applies the pending update with the largest residual."""
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+    telemetry = telemetry_for(telemetry)
+    if threshold is None:
+        threshold = tol
+
+    neighbors = build_neighbors(nodes, instance.edges)
+    table = cost_table(k, cost_fn)
+    penalty = coloring_penalty(table)
+
+    messages = initial_messages(nodes, neighbors, k, message_stream(seed))
+    factors = {e: factor_to_var(m, table, penalty) for e, m in messages.items()}
+    # Factor values the dependants were last rescheduled against
+    propagated = dict(factors)
+    beliefs = {}
+    for i in nodes:
+        belief = [0.0] * k
+        for neighbor in neighbors[i]:
+            belief = [a + b for a, b in zip(belief, factors[(neighbor, i)])]
+        beliefs[i] = belief
+    tracker = ConflictTracker(nodes, neighbors, instance.edges, beliefs)
+
+    # One "iteration" is as many single-message updates as a synchronous sweep
+    sweep = max(1, len(messages))
+    budget = max_iters * len(messages)
+
+    # Max-heap on residual; entries whose version is outdated are skipped when popped
+    heap = []
+    pending = {}
+    version = {e: 0 for e in messages}
+    tiebreak = itertools.count()
+
+    def schedule(edge):
+        i, j = edge
+        candidate = normalize([b - f for b, f in zip(beliefs[i], factors[(j, i)])])
+        updated = normalize(damp(messages[edge], candidate, damping))
+        residual = max(abs(a - b) for a, b in zip(messages[edge], updated))
+        version[edge] += 1
+        if residual > threshold:
+            pending[edge] = updated
+            heapq.heappush(heap, (-residual, next(tiebreak), version[edge], edge))
+        else:
+            pending.pop(edge, None)
+
+    for edge in messages:
+        schedule(edge)
+
+    updates = 0
+    while heap and updates < budget:
+        _, _, stamp, edge = heapq.heappop(heap)
+        if stamp != version[edge]:
+            continue
+
+        i, j = edge
+        messages[edge] = pending.pop(edge)
+        updates += 1
+
+        old_factor = factors[edge]
+        new_factor = factor_to_var(messages[edge], table, penalty)
+        factors[edge] = new_factor
+        beliefs[j] = [b - o + n for b, o, n in zip(beliefs[j], old_factor, new_factor)]
+        tracker.update((j,), beliefs)
+
+        # Damped edges need further passes before they settle
+        schedule(edge)
+
+        # Only messages leaving j read the changed factor message (except j -> i,
+        # which excludes it); they are rescored once the accumulated change
+        # since the last rescoring exceeds the threshold.
+        if max(abs(p - n) for p, n in zip(propagated[edge], new_factor)) > threshold:
+            propagated[edge] = new_factor
+            for nb in neighbors[j]:
+                if nb != i:
+                    schedule((j, nb))
+
+        if updates % sweep == 0:
+            telemetry.record(updates // sweep, tracker.conflicts)
+
+    if updates % sweep != 0 or telemetry.recorded == 0:
+        telemetry.record(max(1, math.ceil(updates / sweep)), tracker.conflicts)
+
+    assignment = {i: colors[tracker.assignment[i]] for i in nodes}
+    conflicts = tracker.conflicts
+
+    return {
+        "assignment": assignment,
+        "conflicts": conflicts,
+        "iterations": max(1, math.ceil(updates / sweep)),
+        "message_updates": updates,
+        "history_conflicts": telemetry.finish().values()
+    }
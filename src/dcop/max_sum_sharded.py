@@ -0,0 +1,362 @@
+import multiprocessing as mp
+import os
+import queue
+import traceback
+from collections import deque
+
+import numpy as np
+
+from src.dcop.max_sum import coloring_penalty, conflict_cost, message_stream
+from src.dcop.max_sum_numpy import (
+    EdgeIndex, Workspace, cost_matrix, factor_messages_into, initial_messages, update_messages_into
+)
+from src.dcop.telemetry import telemetry_for
+
+
+def bfs_order(graph, members, first=None):
+    """BFS order over the nodes in members, starting at first, then at low-degree roots."""
+    inside = np.zeros(graph.n, dtype=bool)
+    inside[members] = True
+    starts, degree, dst = graph.starts, graph.degree, graph.dst
+    roots = members[np.argsort(degree[members], kind="stable")]
+    if first is not None:
+        roots = np.concatenate(([first], roots))
+
+    order = []
+    seen = ~inside
+    for root in roots:
+        if seen[root]:
+            continue
+        seen[root] = True
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for v in dst[starts[u]:starts[u] + degree[u]]:
+                if not seen[v]:
+                    seen[v] = True
+                    queue.append(v)
+    return np.array(order, dtype=np.int64)
+
+
+def partition_nodes(graph, parts, passes=4, imbalance=1.05):
+    """Split nodes into balanced shards with a small edge cut.
+
+    Recursive BFS bisection: each block is ordered by BFS from a
+    pseudo-peripheral node and cut where the work (degree + 1) splits in
+    proportion to the shards on each side. A few greedy passes then move
+    boundary nodes to the neighboring shard holding most of their neighbors
+    while shard loads stay within the imbalance factor.
+    """
+    n = graph.n
+    part = np.zeros(n, dtype=np.int64)
+    if parts <= 1 or n == 0:
+        return part
+
+    starts, degree, dst = graph.starts, graph.degree, graph.dst
+    weight = degree + 1
+
+    def split(members, first_part, count):
+        if count == 1 or len(members) == 0:
+            part[members] = first_part
+            return
+        # The last node reached by one BFS is a good (pseudo-peripheral) start for the next
+        order = bfs_order(graph, members)
+        order = bfs_order(graph, members, first=order[-1])
+        left = count // 2
+        cumulative = np.cumsum(weight[order])
+        cut = int(np.searchsorted(cumulative, cumulative[-1] * left / count))
+        # A heavy node can pull the cut to an end; keep a node for every shard while there are enough
+        if len(order) >= count:
+            cut = min(max(cut, left), len(order) - (count - left))
+        elif len(order) > 1:
+            cut = min(max(cut, 1), len(order) - 1)
+        split(order[:cut], first_part, left)
+        split(order[cut:], first_part + left, count - left)
+
+    split(np.arange(n), 0, parts)
+
+    load = np.bincount(part, weights=weight, minlength=parts)
+    cap = imbalance * weight.sum() / parts
+    for _ in range(passes):
+        moved = 0
+        boundary = np.unique(graph.src[part[graph.src] != part[graph.dst]])
+        for u in boundary:
+            p = part[u]
+            counts = np.bincount(part[dst[starts[u]:starts[u] + degree[u]]], minlength=parts)
+            q = int(np.argmax(counts))
+            # load[p] > weight[u]: never empty a shard
+            if q != p and counts[q] > counts[p] and load[q] + weight[u] <= cap and load[p] > weight[u]:
+                part[u] = q
+                load[p] -= weight[u]
+                load[q] += weight[u]
+                moved += 1
+        if moved == 0:
+            break
+    return part
+
+
+class Shard:
+    """The slice of the directed-edge layout owned by one worker.
+
+    A shard owns its nodes and their outgoing directed edges. Factor messages
+    on edges whose destination lives elsewhere are published to a shared
+    boundary buffer; all other data stays in the worker.
+    """
+
+    def __init__(self, graph, part, p, boundary_id, boundary_offsets, node_slot, node_offsets):
+        self.p = p
+        self.nodes = np.flatnonzero(part == p)
+        own = np.flatnonzero(part[graph.src] == p)
+        self.n = len(self.nodes)
+        self.num_directed = len(own)
+        self.edges = own
+
+        local_node = np.full(graph.n, -1, dtype=np.int64)
+        local_node[self.nodes] = np.arange(self.n)
+        local_edge = np.full(graph.num_directed, -1, dtype=np.int64)
+        local_edge[own] = np.arange(self.num_directed)
+
+        # Own edges keep the global order, so per-node sums add up in the same
+        # order as the single-process engine and results match bit for bit.
+        self.src = local_node[graph.src[own]]
+        self.degree = np.bincount(self.src, minlength=self.n)
+        self.starts = np.concatenate(([0], np.cumsum(self.degree)[:-1]))
+        self.has_edges = self.degree > 0
+
+        # Incoming factor message of own edge e is on rev[e]: a local row, or a
+        # boundary row written by the shard that owns rev[e].
+        rev = graph.rev[own]
+        remote = part[graph.src[rev]] != p
+        self.remote_in = boundary_id[rev[remote]]
+        self.gather = np.where(remote, 0, local_edge[rev])
+        self.gather[remote] = self.num_directed + np.arange(int(remote.sum()))
+
+        # Own edges whose factor message another shard needs (contiguous boundary block)
+        outgoing = part[graph.dst[own]] != p
+        self.out_rows = np.flatnonzero(outgoing)
+        self.out_block = (boundary_offsets[p], boundary_offsets[p + 1])
+
+        # Boundary nodes published for cross-shard conflict counting
+        self.slot_block = (node_offsets[p], node_offsets[p + 1])
+        self.published = local_node[np.flatnonzero((node_slot >= 0) & (part == p))]
+
+        # Undirected edges counted by the shard of their first endpoint
+        mine = part[graph.edge_u] == p
+        self.edge_u = local_node[graph.edge_u[mine]]
+        v = graph.edge_v[mine]
+        v_remote = part[v] != p
+        self.edge_v = np.where(v_remote, 0, local_node[v])
+        self.edge_v[v_remote] = self.n + node_slot[v[v_remote]]
+
+
+def shared_array(ctx, dtype, shape):
+    size = int(np.prod(shape)) if shape else 1
+    raw = ctx.RawArray("b", max(1, size * np.dtype(dtype).itemsize))
+    return raw, dtype, shape
+
+
+def attach(buffer):
+    raw, dtype, shape = buffer
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def shard_worker(shard, init, table, penalty, k, dtype, damping, tol, max_iters,
+                 boundary, slots, stats, barrier, results, telemetry):
+    try:
+        run_shard(shard, init, table, penalty, k, dtype, damping, tol, max_iters,
+                  boundary, slots, stats, barrier, results, telemetry)
+    except Exception:
+        # Release the other workers from the barrier and let the parent raise
+        barrier.abort()
+        results.put(("error", shard.p, traceback.format_exc()))
+
+
+class PointStream:
+    """Telemetry sink of shard 0: forwards each kept point to the parent as it is produced."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def __call__(self, step, value):
+        self.results.put(("point", step, value))
+
+
+def collect_results(procs, results, barrier, on_point=None, poll=1.0):
+    """One result per worker, handing streamed points to on_point on the way.
+
+    Raises if a worker dies without posting a result (OOM kill, segfault).
+    """
+    collected = []
+    try:
+        while len(collected) < len(procs):
+            try:
+                message = results.get(timeout=poll)
+            except queue.Empty:
+                for p, proc in enumerate(procs):
+                    if proc.exitcode not in (None, 0):
+                        raise RuntimeError(f"Max-Sum shard {p} died with exit code {proc.exitcode}")
+                continue
+            if message[0] == "point":
+                on_point(*message[1:])
+            else:
+                collected.append(message)
+    except BaseException:
+        barrier.abort()
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        raise
+    return collected
+
+
+def run_shard(shard, init, table, penalty, k, dtype, damping, tol, max_iters,
+              boundary, slots, stats, barrier, results, telemetry):
+    boundary = attach(boundary)
+    slots = attach(slots)
+    stats = attach(stats)
+
+    ws = Workspace(shard, k, dtype)
+    # Local factors and incoming boundary factors share one pool so the gather
+    # below is a single np.take into a preallocated buffer.
+    pool = np.zeros((shard.num_directed + len(shard.remote_in), k), dtype=ws.dtype)
+    ws.factors = pool[:shard.num_directed]
+    ws.messages[...] = init
+    lo, hi = shard.out_block
+    slot_lo, slot_hi = shard.slot_block
+    assignment_pool = np.zeros(shard.n + len(slots), dtype=np.intp)
+
+    def compute_factors():
+        factor_messages_into(ws, table, penalty)
+        np.take(ws.factors, shard.out_rows, axis=0, out=boundary[lo:hi], mode="clip")
+
+    def decode():
+        np.take(boundary, shard.remote_in, axis=0, out=pool[shard.num_directed:], mode="clip")
+        np.take(pool, shard.gather, axis=0, out=ws.gathered, mode="clip")
+        if shard.num_directed:
+            if ws.belief_rows.shape[0] == shard.n:
+                np.add.reduceat(ws.gathered, shard.starts, axis=0, out=ws.beliefs)
+            else:
+                np.add.reduceat(ws.gathered, shard.starts[shard.has_edges], axis=0, out=ws.belief_rows)
+                ws.beliefs[shard.has_edges] = ws.belief_rows
+        np.argmin(ws.beliefs, axis=1, out=ws.assignment)
+        np.take(ws.assignment, shard.published, out=slots[slot_lo:slot_hi], mode="clip")
+
+    compute_factors()
+    barrier.wait()
+    decode()
+    barrier.wait()
+
+    iteration = -1
+    for iteration in range(max_iters):
+        update_messages_into(shard, ws, damping)
+        local_delta = float(ws.gathered.max()) if shard.num_directed else 0.0
+        ws.swap()
+        compute_factors()
+        barrier.wait()
+
+        decode()
+        barrier.wait()
+
+        assignment_pool[:shard.n] = ws.assignment
+        assignment_pool[shard.n:] = slots
+        local_conflicts = np.count_nonzero(ws.assignment[shard.edge_u] == assignment_pool[shard.edge_v])
+        stats[shard.p] = (local_delta, local_conflicts)
+        barrier.wait()
+
+        # Every worker reads the same table, so all of them stop together
+        max_delta = float(stats[:, 0].max())
+        if telemetry is not None:
+            telemetry.record(iteration + 1, int(stats[:, 1].sum()))
+        if max_delta < tol:
+            break
+
+    # Only shard 0 keeps the conflict series; it is filtered here and replayed by the parent
+    # (its points have already been streamed when it has a sink)
+    history = None
+    if telemetry is not None:
+        points = [] if telemetry.sink is not None else list(telemetry.points)
+        history = (points, (telemetry.last_step, telemetry.last), telemetry.recorded)
+    results.put(("done", shard.p, shard.nodes, ws.assignment.copy(), history, iteration + 1))
+
+
+def max_sum_sharded(instance, max_iters=50, damping=0.5, tol=1e-6, cost_fn=conflict_cost,
+                    workers=None, dtype="float64", seed=None, telemetry=None):
+    """Synchronous Max-Sum split over worker processes; identical to the NumPy engine.
+
+    Shard 0 records the conflict series. If telemetry has a sink, the kept
+    points reach it while the run is going; otherwise they are handed over
+    when the workers finish.
+    """
+    nodes = instance.nodes
+    colors = instance.colors
+    k = len(colors)
+
+    graph = EdgeIndex(nodes, instance.edges)
+    parts = max(1, min(workers or os.cpu_count() or 1, graph.n))
+    part = partition_nodes(graph, parts)
+
+    # Boundary directed edges, grouped by the shard that writes them
+    crossing = np.flatnonzero(part[graph.src] != part[graph.dst])
+    crossing = crossing[np.argsort(part[graph.src[crossing]], kind="stable")]
+    boundary_id = np.full(graph.num_directed, -1, dtype=np.int64)
+    boundary_id[crossing] = np.arange(len(crossing))
+    boundary_offsets = np.concatenate(([0], np.cumsum(np.bincount(part[graph.src[crossing]], minlength=parts))))
+
+    # Nodes with a neighbor in another shard get a slot in the shared assignment table
+    boundary_nodes = np.unique(graph.src[crossing])
+    boundary_nodes = boundary_nodes[np.argsort(part[boundary_nodes], kind="stable")]
+    node_slot = np.full(graph.n, -1, dtype=np.int64)
+    node_slot[boundary_nodes] = np.arange(len(boundary_nodes))
+    node_offsets = np.concatenate(([0], np.cumsum(np.bincount(part[boundary_nodes], minlength=parts))))
+
+    shards = [Shard(graph, part, p, boundary_id, boundary_offsets, node_slot, node_offsets) for p in range(parts)]
+
+    table = cost_matrix(colors, cost_fn, dtype)
+    penalty = coloring_penalty(table)
+    init = initial_messages(graph, k, message_stream(seed))
+    telemetry = telemetry_for(telemetry)
+
+    ctx = mp.get_context()
+    boundary = shared_array(ctx, np.dtype(dtype), (len(crossing), k))
+    slots = shared_array(ctx, np.intp, (len(boundary_nodes),))
+    stats = shared_array(ctx, np.float64, (parts, 2))
+    barrier = ctx.Barrier(parts)
+    results = ctx.Queue()
+    series = telemetry.spawn(PointStream(results) if telemetry.sink is not None else None)
+
+    procs = [
+        ctx.Process(
+            target=shard_worker,
+            args=(shard, init[shard.edges], table, penalty, k, dtype, damping, tol, max_iters,
+                  boundary, slots, stats, barrier, results, series if shard.p == 0 else None),
+        )
+        for shard in shards
+    ]
+    for proc in procs:
+        proc.start()
+    collected = collect_results(procs, results, barrier, telemetry.keep)
+    for proc in procs:
+        proc.join()
+    failed = [r for r in collected if r[0] == "error"]
+    if failed:
+        raise RuntimeError(f"Max-Sum shard {failed[0][1]} failed:\n{failed[0][2]}")
+
+    assignment_index = np.zeros(graph.n, dtype=np.intp)
+    for _, _, shard_nodes, shard_assignment, _, _ in collected:
+        assignment_index[shard_nodes] = shard_assignment
+    _, _, _, _, (points, last, recorded), iterations = min(collected, key=lambda r: r[1])
+    telemetry.replay(points, last, recorded)
+
+    assignment = {node: colors[assignment_index[i]] for i, node in enumerate(nodes)}
+    conflicts = int(np.count_nonzero(assignment_index[graph.edge_u] == assignment_index[graph.edge_v]))
+
+    return {
+        "assignment": assignment,
+        "conflicts": conflicts,
+        "iterations": iterations,
+        "history_conflicts": telemetry.finish().values(),
+        "shards": parts,
+        "cut_edges": len(crossing) // 2
+    }
@@ -0,0 +1,40 @@
+from collections import deque
+
+
+class MessageBus:
+    """Round-based mailboxes for the ADOPT solvers, one inbox deque per agent.
+
+    A message is a (sender, recipient, msg_type, data) tuple. send() appends
+    it to the recipient's mailbox for the next round in O(1); advance() makes
+    those mailboxes the inboxes read during the round, so messages sent in
+    round t are seen in round t+1, in the order they were sent. Messages an
+    agent did not read in its round are dropped by the next advance().
+    """
+
+    def __init__(self, agents):
+        self.inbox = {a: deque() for a in agents}
+        self.outbox = {a: deque() for a in agents}
+        # Recipients with mail in the outbox, and in the inbox of the current round
+        self.pending = []
+        self.delivered = []
+        self.sent = 0
+
+    def send(self, sender, recipient, msg_type, data):
+        box = self.outbox[recipient]
+        if not box:
+            self.pending.append(recipient)
+        box.append((sender, recipient, msg_type, data))
+        self.sent += 1
+
+    def advance(self):
+        """Start a new round: deliver everything sent during the last one."""
+        for agent in self.delivered:
+            self.inbox[agent].clear()
+        self.inbox, self.outbox = self.outbox, self.inbox
+        self.delivered, self.pending = self.pending, []
+
+    def receive(self, agent):
+        """Yield the agent's messages for this round, emptying its inbox."""
+        box = self.inbox[agent]
+        while box:
+            yield box.popleft()
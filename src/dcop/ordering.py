@@ -0,0 +1,268 @@
+import heapq
+import random
+
+from src.dcop.pseudotree import Adjacency, by_name, pseudotree_positions
+
+
+# Each heuristic maps an Adjacency to a pseudo-tree over node positions, in
+# the (parent, children, pseudo_parents, pseudo_children, order) layout of
+# pseudotree_positions. DFS heuristics only choose the roots and the order
+# neighbors are explored in; elimination heuristics build the tree of an
+# elimination order directly, so its width is the order's induced width.
+
+def first_order(adjacency, rng, mutual_back_edges=False):
+    """Root at the first node, neighbors in edge order (the solvers' default)."""
+    return pseudotree_positions(adjacency.neighbors, None, mutual_back_edges)
+
+
+def max_degree_order(adjacency, rng, mutual_back_edges=False):
+    """Root at the node of largest degree, neighbors in edge order."""
+    neighbors = adjacency.neighbors
+    return pseudotree_positions(neighbors, by_degree(neighbors), mutual_back_edges)
+
+
+def most_connected_order(adjacency, rng, mutual_back_edges=False):
+    """Root at the node of largest degree and always descend into the best-connected neighbor first."""
+    neighbors = adjacency.neighbors
+    degree = [len(nb) for nb in neighbors]
+    ordered = [sorted(nb, key=lambda v: -degree[v]) for nb in neighbors]
+    return pseudotree_positions(ordered, by_degree(neighbors), mutual_back_edges)
+
+
+def min_fill_order(adjacency, rng, mutual_back_edges=False):
+    """Tree of a greedy min-fill elimination order."""
+    order, induced = elimination_order(adjacency.neighbors, min_fill=True)
+    return elimination_tree(adjacency.neighbors, order, induced, mutual_back_edges)
+
+
+def min_width_order(adjacency, rng, mutual_back_edges=False):
+    """Tree of a greedy min-degree (min induced width) elimination order."""
+    order, induced = elimination_order(adjacency.neighbors)
+    return elimination_tree(adjacency.neighbors, order, induced, mutual_back_edges)
+
+
+def random_order(adjacency, rng, mutual_back_edges=False):
+    """DFS from a random root with neighbors in random order (see restarts in plan_pseudotree)."""
+    starts = list(range(len(adjacency.neighbors)))
+    rng.shuffle(starts)
+    neighbors = []
+    for nb in adjacency.neighbors:
+        nb = nb[:]
+        rng.shuffle(nb)
+        neighbors.append(nb)
+    return pseudotree_positions(neighbors, starts, mutual_back_edges)
+
+
+ORDERINGS = {
+    "first": first_order,
+    "max_degree": max_degree_order,
+    "most_connected": most_connected_order,
+    "min_fill": min_fill_order,
+    "min_width": min_width_order,
+    "random": random_order,
+}
+
+
+def by_degree(neighbors):
+    return sorted(range(len(neighbors)), key=lambda u: -len(neighbors[u]))
+
+
+def fill_in(nbrs, graph):
+    """Edges that eliminating a node with these neighbors would add."""
+    missing = 0
+    for a in nbrs:
+        missing += len(nbrs) - 1 - len(graph[a] & nbrs)
+    return missing // 2
+
+
+def elimination_order(neighbors, min_fill=False):
+    """Greedy elimination by min-degree, or by min-fill when min_fill is set.
+
+    Eliminating a node connects its remaining neighbors. Fill counts are
+    kept exact incrementally: each added edge costs a few set operations
+    instead of recounting the neighborhoods around it. Ties go to the lower
+    position. Returns the order and, per node, its remaining neighbors when
+    it was eliminated.
+    """
+    n = len(neighbors)
+    graph = [set(nb) - {u} for u, nb in enumerate(neighbors)]
+    if min_fill:
+        score = [fill_in(graph[u], graph) for u in range(n)]
+    else:
+        score = [len(graph[u]) for u in range(n)]
+    heap = [(score[u], u) for u in range(n)]
+    heapq.heapify(heap)
+    eliminated = [False] * n
+    order = []
+    induced = [None] * n
+    while heap:
+        s, u = heapq.heappop(heap)
+        if eliminated[u] or s != score[u]:
+            continue
+        eliminated[u] = True
+        order.append(u)
+        nbrs = induced[u] = graph[u]
+        graph[u] = set()
+        touched = set(nbrs)
+        for a in nbrs:
+            graph[a].discard(u)
+        if min_fill:
+            # Pairs (u, c) left the neighborhood of a; the missing ones are c not adjacent to u
+            for a in nbrs:
+                score[a] -= len(graph[a] - nbrs)
+        remaining = list(nbrs)
+        for i, a in enumerate(remaining):
+            for b in remaining[i + 1:]:
+                if b in graph[a]:
+                    continue
+                if min_fill:
+                    common = graph[a] & graph[b]
+                    for c in common:
+                        score[c] -= 1
+                    touched |= common
+                    score[a] += len(graph[a] - graph[b])
+                    score[b] += len(graph[b] - graph[a])
+                graph[a].add(b)
+                graph[b].add(a)
+        for a in touched:
+            if not min_fill:
+                score[a] = len(graph[a])
+            heapq.heappush(heap, (score[a], a))
+    return order, induced
+
+
+def elimination_tree(neighbors, order, induced, mutual_back_edges=False):
+    """Pseudo-tree that hangs each node below the first of its induced neighbors to be eliminated after it.
+
+    Every edge then joins an ancestor and a descendant, and the separator of
+    a node is its induced neighborhood.
+    """
+    n = len(neighbors)
+    when = [0] * n
+    for t, u in enumerate(order):
+        when[u] = t
+    parent = [-1] * n
+    for u in order:
+        if induced[u]:
+            parent[u] = min(induced[u], key=when.__getitem__)
+    top_down = order[::-1]
+    children = [[] for _ in range(n)]
+    for u in top_down:
+        if parent[u] >= 0:
+            children[parent[u]].append(u)
+
+    pseudo_parents = [[] for _ in range(n)]
+    pseudo_children = [[] for _ in range(n)]
+    # marked[v] == u: v is already a pseudo-parent of u (parallel edges)
+    marked = [-1] * n
+    for u in top_down:
+        for v in neighbors[u]:
+            if v == parent[u] or parent[v] == u or marked[v] == u:
+                continue
+            if when[v] > when[u] or mutual_back_edges:
+                marked[v] = u
+                pseudo_parents[u].append(v)
+                pseudo_children[v].append(u)
+    return parent, children, pseudo_parents, pseudo_children, top_down
+
+
+def node_depths(parent, order):
+    """Depth of every node (roots at 1), from a preorder."""
+    depth = [0] * len(parent)
+    for u in order:
+        depth[u] = 1 if parent[u] < 0 else depth[parent[u]] + 1
+    return depth
+
+
+def tree_shape(parent, children, pseudo_parents, order):
+    """Induced width (largest separator) and depth (nodes on the longest root-to-leaf path).
+
+    The separator of a node is its parent, its pseudo-parents and the
+    separators of its children, minus itself; a DPOP UTIL message from it
+    has d^|separator| entries. The separator unions cost O(n * width), far
+    more than building the tree, so only call this when the width is needed.
+    """
+    depth = node_depths(parent, order)
+    separator = [None] * len(parent)
+    width = 0
+    for u in reversed(order):
+        # Only ancestors count (mutual back-edges also list descendants)
+        sep = {v for v in pseudo_parents[u] if depth[v] < depth[u]}
+        if parent[u] >= 0:
+            sep.add(parent[u])
+        for c in children[u]:
+            sep |= separator[c]
+            separator[c] = None
+        sep.discard(u)
+        separator[u] = sep
+        width = max(width, len(sep))
+    return width, max(depth, default=0)
+
+
+def plan_pseudotree(nodes, edges, ordering="first", restarts=10, seed=None, mutual_back_edges=False,
+                    adjacency=None, shape=False):
+    """Pseudo-tree built under an ordering heuristic, with its predicted width and depth.
+
+    ordering is a name from ORDERINGS, a function with the same signature
+    as its entries, or "cheapest" to try every heuristic (and restarts random
+    trees) and keep the smallest (width, depth). "random" keeps the best of
+    restarts random trees. The result holds parent, children, pseudo_parents and
+    pseudo_children keyed by node (as build_pseudotree returns them), the
+    DFS order, the roots and the tree's width and depth.
+
+    The width is only computed (see tree_shape) when trees are compared,
+    i.e. for "cheapest" and "random", or when shape is set; otherwise it
+    is None and a single heuristic costs no more than build_pseudotree.
+
+    The elimination heuristics cost on the order of n * width^2 set
+    operations, so on wide graphs the DFS heuristics are much faster.
+    """
+    if adjacency is None:
+        adjacency = Adjacency(nodes, edges)
+    rng = random.Random(seed)
+
+    if ordering == "cheapest":
+        candidates = [name for name in ORDERINGS if name != "random"] + ["random"] * max(1, restarts)
+    elif ordering == "random":
+        candidates = ["random"] * max(1, restarts)
+    else:
+        candidates = [ordering]
+
+    best = None
+    for candidate in candidates:
+        heuristic = ORDERINGS.get(candidate) if isinstance(candidate, str) else candidate
+        if heuristic is None:
+            raise ValueError(f"Unknown ordering: {candidate}")
+        tree = heuristic(adjacency, rng, mutual_back_edges)
+        parent, children, pseudo_parents, _, order = tree
+        if shape or len(candidates) > 1:
+            tree_size = tree_shape(parent, children, pseudo_parents, order)
+        else:
+            tree_size = (None, max(node_depths(parent, order), default=0))
+        if best is None or tree_size < best[0]:
+            name = candidate if isinstance(candidate, str) else "custom"
+            best = (tree_size, name, tree)
+
+    (width, depth), name, (parent, children, pseudo_parents, pseudo_children, order) = best
+    return {
+        "parent": {node: (nodes[p] if p >= 0 else None) for node, p in zip(nodes, parent)},
+        "children": by_name(nodes, children),
+        "pseudo_parents": by_name(nodes, pseudo_parents),
+        "pseudo_children": by_name(nodes, pseudo_children),
+        "order": [nodes[u] for u in order],
+        "roots": [nodes[u] for u in order if parent[u] < 0],
+        "ordering": name,
+        "width": width,
+        "depth": depth,
+    }
+
+
+def compare_orderings(nodes, edges, orderings=None, restarts=10, seed=None):
+    """Predicted width and depth of the pseudo-tree under each ordering, before solving."""
+    adjacency = Adjacency(nodes, edges)
+    report = {}
+    for ordering in orderings or ORDERINGS:
+        plan = plan_pseudotree(nodes, edges, ordering, restarts=restarts, seed=seed, adjacency=adjacency, shape=True)
+        root = plan["roots"][0] if plan["roots"] else None
+        report[ordering] = {"width": plan["width"], "depth": plan["depth"], "root": root}
+    return report
@@ -0,0 +1,115 @@
+import gc
+
+
+class Adjacency:
+    """Neighbor lists by node position, built in one pass over the edges (edge order kept)."""
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.index = {n: i for i, n in enumerate(nodes)}
+        index = self.index
+        self.neighbors = [[] for _ in nodes]
+        neighbors = self.neighbors
+        for u, v in edges:
+            i, j = index[u], index[v]
+            neighbors[i].append(j)
+            if j != i:
+                neighbors[j].append(i)
+
+
+def build_pseudotree(nodes, edges, root=None, adjacency=None, mutual_back_edges=False):
+    """DFS pseudo-tree (a forest when the graph is disconnected).
+
+    The DFS starts at root (default nodes[0]) and then at every node still
+    unvisited, in node order, so each component gets its own root. Tree
+    edges become parent/children, back-edges to an ancestor become
+    pseudo_parents/pseudo_children. With mutual_back_edges the ancestor also
+    lists the descendant as a pseudo-parent (and pseudo-child), so both ends
+    check the constraint; basic ADOPT relies on this. The DFS keeps an
+    explicit stack, so deep graphs do not hit the recursion limit.
+    """
+    # Millions of small lists and no cycles: collector passes would only slow the build down
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        if adjacency is None:
+            adjacency = Adjacency(nodes, edges)
+        starts = None if root is None else [adjacency.index[root], *range(len(nodes))]
+        tree = pseudotree_positions(adjacency.neighbors, starts, mutual_back_edges)
+        parent, children, pseudo_parents, pseudo_children, _ = tree
+        parent = {node: (nodes[p] if p >= 0 else None) for node, p in zip(nodes, parent)}
+        return parent, by_name(nodes, children), by_name(nodes, pseudo_parents), by_name(nodes, pseudo_children)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def pseudotree_positions(neighbors, starts=None, mutual_back_edges=False):
+    """build_pseudotree over node positions: parent (-1 for roots), lists of positions and the DFS preorder.
+
+    A new DFS starts at every node of starts (default: all nodes in order)
+    not visited yet, and neighbors are explored in list order.
+    """
+    n = len(neighbors)
+    # state: 0 unvisited, 1 on the DFS path, 2 finished
+    state = [0] * n
+    parent = [-1] * n
+    children = [[] for _ in range(n)]
+    pseudo_parents = [[] for _ in range(n)]
+    pseudo_children = [[] for _ in range(n)]
+    # pos[u] = next neighbor of u to look at when the DFS comes back to u
+    pos = [0] * n
+    order = []
+    # Pseudo-parents of the nodes with long lists, as sets, so hubs need no O(deg) scans
+    seen = {}
+
+    for start in range(n) if starts is None else starts:
+        if state[start]:
+            continue
+        state[start] = 1
+        order.append(start)
+        stack = [start]
+        while stack:
+            u = stack[-1]
+            nbrs, i, p = neighbors[u], pos[u], parent[u]
+            end = len(nbrs)
+            while i < end:
+                v = nbrs[i]
+                i += 1
+                if v == p:
+                    continue
+                s = state[v]
+                if not s:
+                    parent[v] = u
+                    children[u].append(v)
+                    state[v] = 1
+                    order.append(v)
+                    stack.append(v)
+                    break
+                # A visited neighbor is an ancestor (s == 1) or a finished descendant,
+                # which already recorded this back-edge from its side
+                if s == 1 or mutual_back_edges:
+                    pp = pseudo_parents[u]
+                    if len(pp) < 16:
+                        if v in pp:
+                            continue
+                    else:
+                        found = seen.get(u)
+                        if found is None:
+                            found = seen[u] = set(pp)
+                        if v in found:
+                            continue
+                        found.add(v)
+                    pp.append(v)
+                    pseudo_children[v].append(u)
+            else:
+                stack.pop()
+                state[u] = 2
+            pos[u] = i
+
+    return parent, children, pseudo_parents, pseudo_children, order
+
+
+def by_name(nodes, lists):
+    """Per-position lists of positions, keyed and valued by node name."""
+    return {node: [nodes[j] for j in positions] for node, positions in zip(nodes, lists)}
@@ -0,0 +1,78 @@
+import itertools
+import multiprocessing as mp
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.dcop.gibbs import dcop_gibbs
+from src.dcop.max_sum import max_sum
+
+
+def run_gibbs(instance, beta, seed, max_iters, options):
+    return dcop_gibbs(instance, max_iters=max_iters, beta=beta, seed=seed, **options)
+
+
+def run_max_sum(instance, damping, seed, max_iters, options):
+    return max_sum(instance, max_iters=max_iters, damping=damping, seed=seed, **options)
+
+
+# algorithm -> runner(instance, param, seed, max_iters, options); param is beta or damping
+ALGORITHMS = {
+    "gibbs": run_gibbs,
+    "max_sum": run_max_sum,
+}
+
+# Instances are shipped to each worker once, jobs only refer to them by position
+worker_instances = []
+
+
+def init_worker(instances):
+    worker_instances[:] = instances
+
+
+def sweep_jobs(instances, algorithms, params, seeds):
+    """Every (instance position, algorithm, param, seed) combination, in a stable order."""
+    return list(itertools.product(range(len(instances)), algorithms, params, seeds))
+
+
+def run_job(job, max_iters, options):
+    pos, algorithm, param, seed = job
+    result = ALGORITHMS[algorithm](worker_instances[pos], param, seed, max_iters, options.get(algorithm, {}))
+    return job, result
+
+
+def job_record(instances, job, result):
+    pos, algorithm, param, seed = job
+    return {"instance": instances[pos].name, "algorithm": algorithm, "param": param, "seed": seed,
+            "result": result}
+
+
+def run_sweep(instances, jobs, max_iters=50, workers=None, options=None):
+    """Run sweep jobs across a process pool, yielding each record as soon as its job finishes.
+
+    Every solver call draws from a private stream seeded by the job's seed, so a
+    job's result is the same whatever the worker count or completion order.
+    options maps an algorithm name to extra keyword arguments for its solver.
+    """
+    for name in {job[1] for job in jobs}:
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown sweep algorithm: {name}")
+    options = options or {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    if workers == 1:
+        init_worker(instances)
+        for job in jobs:
+            yield job_record(instances, *run_job(job, max_iters, options))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(),
+                             initializer=init_worker, initargs=(instances,)) as pool:
+        # Keep a bounded number of jobs in flight so huge sweeps do not queue everything up front
+        queue = iter(jobs)
+        pending = {pool.submit(run_job, job, max_iters, options) for job in itertools.islice(queue, 4 * workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield job_record(instances, *future.result())
+                for job in itertools.islice(queue, 1):
+                    pending.add(pool.submit(run_job, job, max_iters, options))
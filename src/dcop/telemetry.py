@@ -0,0 +1,138 @@
+import csv
+import os
+from collections import deque
+
+import numpy as np
+
+
+class Telemetry:
+    """One metric series per run (conflicts by iteration), kept in bounded memory.
+
+    capacity caps the points held in memory (a ring buffer of the most recent
+    ones; None keeps them all). every keeps only steps that are multiples of
+    it and changes_only keeps a point only when the value differs from the
+    last kept one. Every kept point is also handed to sink(step, value), so
+    the full series can stream to disk while memory holds only the tail. The
+    last point of a run is always kept (see finish).
+    """
+
+    def __init__(self, capacity=None, every=1, changes_only=False, sink=None):
+        self.capacity = capacity
+        self.every = max(1, every)
+        self.changes_only = changes_only
+        self.sink = sink
+        self.points = deque(maxlen=capacity)
+        self.recorded = 0
+        self.last = None
+        self.last_step = None
+        self.kept_step = None
+        self.kept_value = None
+
+    def spawn(self, sink=None):
+        """A copy of the settings with its own sink (none by default), for recording in another process (see replay)."""
+        return Telemetry(self.capacity, self.every, self.changes_only, sink)
+
+    def keep(self, step, value):
+        self.points.append((step, value))
+        self.kept_step, self.kept_value = step, value
+        if self.sink is not None:
+            self.sink(step, value)
+
+    def record(self, step, value):
+        self.recorded += 1
+        self.last, self.last_step = value, step
+        if step % self.every:
+            return
+        if self.changes_only and self.kept_step is not None and value == self.kept_value:
+            return
+        self.keep(step, value)
+
+    def extend(self, steps, values):
+        """record() for a block of consecutive points, filtered with array operations."""
+        steps = np.asarray(steps)
+        values = np.asarray(values)
+        if len(values) == 0:
+            return
+        self.recorded += len(values)
+        self.last, self.last_step = values[-1].item(), steps[-1].item()
+        if self.every > 1:
+            candidates = steps % self.every == 0
+            steps, values = steps[candidates], values[candidates]
+        if self.changes_only and len(values):
+            # A candidate equal to the one before it was either dropped for the
+            # same reason or kept, so comparing neighbours compares with the last kept value
+            changed = np.empty(len(values), dtype=bool)
+            changed[0] = self.kept_step is None or values[0] != self.kept_value
+            changed[1:] = values[1:] != values[:-1]
+            steps, values = steps[changed], values[changed]
+        if len(values) == 0:
+            return
+        if self.sink is None:
+            self.points.extend(zip(steps.tolist(), values.tolist()))
+            self.kept_step, self.kept_value = steps[-1].item(), values[-1].item()
+        else:
+            for step, value in zip(steps.tolist(), values.tolist()):
+                self.keep(step, value)
+
+    def replay(self, points, last=None, recorded=None):
+        """Take over points already filtered by a spawned copy, its last point and its count of recorded steps."""
+        for step, value in points:
+            self.keep(step, value)
+            self.last, self.last_step = value, step
+        self.recorded += len(points) if recorded is None else recorded
+        if last is not None:
+            self.last_step, self.last = last
+
+    def finish(self):
+        """Make sure the final point is kept; returns self."""
+        if self.last_step is not None and self.kept_step != self.last_step:
+            self.keep(self.last_step, self.last)
+        return self
+
+    def steps(self):
+        return [step for step, _ in self.points]
+
+    def values(self):
+        return [value for _, value in self.points]
+
+    def close(self):
+        if hasattr(self.sink, "close"):
+            self.sink.close()
+
+
+class CsvSink:
+    """Appends (step, value) rows to a CSV file as they are produced."""
+
+    def __init__(self, path, header=("step", "value")):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def __call__(self, step, value):
+        self.writer.writerow((step, value))
+
+    def close(self):
+        self.file.close()
+
+
+def telemetry_for(telemetry):
+    """The caller's telemetry, or a default one that keeps every point like a plain list."""
+    return Telemetry() if telemetry is None else telemetry
+
+
+def add_telemetry_arguments(parser):
+    parser.add_argument("--history-cap", type=int, default=None, help="keep only the last N history points")
+    parser.add_argument("--history-every", type=int, default=1, help="keep every N-th history point")
+    parser.add_argument("--history-changes", action="store_true", help="keep history points only when they change")
+    parser.add_argument("--history-csv", default=None, help="stream the kept history points to this CSV file")
+
+
+def telemetry_from_args(args, label=None):
+    """Telemetry set up from the --history-* flags; a label goes into the CSV name (runs.csv -> runs.<label>.csv)."""
+    path = args.history_csv
+    if path and label:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{label}{ext}"
+    sink = CsvSink(path) if path else None
+    return Telemetry(capacity=args.history_cap, every=args.history_every, changes_only=args.history_changes,
+                     sink=sink)
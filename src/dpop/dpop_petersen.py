@@ -1,7 +1,13 @@
+import argparse
+import os
+import sys
 import time
 from itertools import product
 import matplotlib.pyplot as plt
 import networkx as nx
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.dcop.ordering import ORDERINGS, plan_pseudotree
 
 #   #PHASE 1: PSEUDO-TREE SETUP
 COLORS = [0, 1, 2]
@@ -47,54 +53,21 @@ def print_util_table(node_id, separator, util_table):
                 break
     print()
 
-def dpop():
+def dpop(ordering="first"):
     t0 = time.perf_counter()
-    parent = {0: None}
-    children = {i: [] for i in NODES}
-    visited = []
-    
-    stack = [0]
-    while stack:
-        u = stack[-1]
-        if u not in visited:
-            visited.append(u)
-            neighbors = []
-            for e in EDGES:
-                if e[0]==u: neighbors.append(e[1])
-                elif e[1]==u: neighbors.append(e[0])
-            neighbors.sort() 
-            
-            found = False
-            for v in neighbors:
-                if v not in visited:
-                    parent[v] = u
-                    children[u].append(v)
-                    stack.append(v)
-                    found = True
-                    break
-            if not found:
-                stack.pop()
-        else:
-            stack.pop()
-
-    # Calculate PPs 
-    pp = {i: set() for i in NODES}
-    for u in NODES:
-        neighbors = []
-        for e in EDGES:
-            if e[0]==u: neighbors.append(e[1])
-            elif e[1]==u: neighbors.append(e[0])
-        for v in neighbors:
-            if v == parent[u] or v in children[u]: continue
-            if visited.index(v) < visited.index(u):
-                pp[u].add(v)
+    # Pseudo-tree from the shared ordering heuristics (src/dcop/ordering.py)
+    tree = plan_pseudotree(NODES, EDGES, ordering, shape=True)
+    parent = tree["parent"]
+    children = tree["children"]
+    visited = tree["order"]
+    pp = {u: set(tree["pseudo_parents"][u]) for u in NODES}
 
     # --- 2. INDUCED SEPARATORS ---
     separator_map = {}
     bottom_up_order = visited[::-1]
     
     for u in bottom_up_order:
-        if u == 0: continue
+        if parent[u] is None: continue
         sep = set()
         sep.add(parent[u])
         sep.update(pp[u])
@@ -113,9 +86,10 @@ def dpop():
     print(f"=== DPOP: Petersen Graph (3-Coloring) ===")
     
     print("\n--- Pseudo-tree Structure ---")
-    print(f"Root: 0")
+    print(f"Ordering: {tree['ordering']} (predicted width {tree['width']}, depth {tree['depth']})")
+    print(f"Root: {', '.join(map(str, tree['roots']))}")
     for u in NODES:
-        if u == 0: continue
+        if parent[u] is None: continue
         p = parent[u]
         pps = sorted(list(pp[u]))
         print(f"Node {u}: Parent={p}, PPs={pps}")
@@ -123,7 +97,7 @@ def dpop():
     print("\n--- UTIL TABLES (Cost/Utility passed up) ---\n")
 
     for u in bottom_up_order:
-        if u == 0: continue
+        if parent[u] is None: continue
         
         sep = separator_map[u]
         sep_dims = len(sep)
@@ -174,7 +148,7 @@ def dpop():
     # PHASE 3: VALUE PROPAGATION (Top-Down) 
     VALUE = {}
     for u in visited: 
-        if u == 0:
+        if parent[u] is None:
             VALUE[u] = 0 
         else:
             sep = separator_map[u]
@@ -282,4 +256,7 @@ def dpop():
     plt.close()
 
 if __name__ == "__main__":
-    dpop()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ordering", default="first", choices=[*ORDERINGS, "cheapest"],
+                        help="pseudo-tree ordering heuristic")
+    dpop(parser.parse_args().ordering)
@@ -0,0 +1,37 @@
+import glob
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from src.dcop.max_sum import load_instance, max_sum, max_sum_batch
+
+GRAPHS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "examples", "graphs", "*.json")))
+
+
+@pytest.mark.parametrize("max_iters", [0, 1, 30])
+def test_batch_matches_sequential_numpy(max_iters):
+    instances = [load_instance(path) for path in GRAPHS]
+    random.seed(3)
+    sequential = [max_sum(instance, max_iters=max_iters, engine="numpy") for instance in instances]
+    random.seed(3)
+    batch = max_sum_batch(instances, max_iters=max_iters)
+
+    assert len(batch) == len(instances)
+    for expected, result in zip(sequential, batch):
+        assert result["assignment"] == expected["assignment"]
+        assert result["conflicts"] == expected["conflicts"]
+        assert result["iterations"] == expected["iterations"]
+        assert list(result["history_conflicts"]) == list(expected["history_conflicts"])
+
+
+def test_batch_without_iterations_decodes_initial_messages():
+    instances = [load_instance(path) for path in GRAPHS]
+    for instance, result in zip(instances, max_sum_batch(instances, max_iters=0, seed=1)):
+        assert result["iterations"] == 0
+        assert set(result["assignment"]) == set(instance.nodes)
+        assert result["conflicts"] == sum(result["assignment"][u] == result["assignment"][v]
+                                          for u, v in instance.edges)